@@ -0,0 +1,247 @@
+"""
+Times the hot paths of the game logic and compares them against a baseline.
+
+Each case is timed like timeit: the case is looped until a sample takes at
+least MIN_TIME, the fastest of several samples is kept, and the result is
+the time per operation. Results are written as JSON so a run can be saved
+as the baseline of later runs, and the script exits with an error when a
+case got slower than the baseline by more than the threshold.
+
+Deck draws are timed on a fresh deck, as every hand without a shoe is
+dealt. The distributions with 0 or 1 known cards enumerate millions of
+hands and take seconds each, so they only run with --full.
+
+Run it with:
+    python benchmark.py --save baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+from core import Card, CountDeck, Deck, Game, Hand, Statistics, Suit
+
+MIN_TIME = 0.02 # Shortest sample of a case, in seconds
+REPEAT = 15 # Samples taken of each case
+HANDS = 1000 # Hands evaluated per sample of the hand cases
+DECKS = [1, 8, 99]
+KNOWN = [Card(3, Suit.clubs), Card(3, Suit.spades), Card(10, Suit.clubs),
+         Card(12, Suit.hearts), Card(1, Suit.hearts)]
+
+
+class Case:
+    """
+    Class representing a timed piece of code.
+    """
+    def __init__(self, name: str, run: Callable[[], object], ops: int=1, full: bool=False):
+        """
+        Arguments:
+            name {str} -- Name of the case.
+            run {Callable[[], object]} -- Code to time.
+
+        Keyword Arguments:
+            ops {int} -- Operations done by one call of run. (default: {1})
+            full {bool} -- True if the case only runs in the full suite. (default: {False})
+        """
+        self.name = name
+        self.run = run
+        self.ops = ops
+        self.full = full
+
+
+class Result:
+    """
+    Class representing the time of a case and how it compares to its baseline.
+    """
+    def __init__(self, name: str, seconds: float, baseline: float=None):
+        """
+        Arguments:
+            name {str} -- Name of the case.
+            seconds {float} -- Fastest time per operation.
+
+        Keyword Arguments:
+            baseline {float} -- Time per operation of the baseline. (default: {None})
+        """
+        self.name = name
+        self.seconds = seconds
+        self.baseline = baseline
+
+    @property
+    def ratio(self) -> float:
+        """
+        Returns:
+            float -- Time relative to the baseline, None without a baseline.
+        """
+        return self.seconds / self.baseline if self.baseline else None
+
+    def __str__(self) -> str:
+        line = "%-40s %12s" % (self.name, _format(self.seconds))
+        if self.ratio is not None:
+            line += "  %12s  x%.2f" % (_format(self.baseline), self.ratio)
+        return line
+
+
+def cases(seed: int=0) -> List[Case]:
+    """
+    Builds the benchmark cases. Random inputs are generated up front from a
+    seed, so every run times the same work.
+
+    Keyword Arguments:
+        seed {int} -- Seed of the random inputs. (default: {0})
+
+    Returns:
+        List[Case] -- Every case, including the full suite ones.
+    """
+    rng = random.Random(seed)
+    hands = [Hand([CountDeck.CARDS[i] for i in rng.sample(range(52), 5)]) for _ in range(HANDS)]
+    result = [
+        Case("Hand.type", lambda: [hand.type for hand in hands], HANDS),
+        Case("Hand.type_side", lambda: [hand.type_side for hand in hands], HANDS),
+        Case("Hand.payout", lambda: [hand.payout(1) for hand in hands], HANDS)
+    ]
+    for decks in DECKS:
+        result += [
+            Case("Deck(%d)" % decks, lambda d=decks: Deck(d)),
+            Case("Deck(%d).shuffle" % decks, Deck(decks).shuffle),
+            Case("Deck(%d) + draw x5" % decks, lambda d=decks: _deal(Deck(d))),
+            Case("CountDeck(%d)" % decks, lambda d=decks: CountDeck(d)),
+            Case("CountDeck(%d) + draw x5" % decks, lambda d=decks: _deal(CountDeck(d)))
+        ]
+    for decks in DECKS:
+        game = Game(decks)
+        result.append(Case("Game(%d).deal" % decks, game.deal))
+        shoe = Game(decks, shoe=True)
+        result.append(Case("Game(%d, shoe).deal" % decks, shoe.deal))
+    for known in range(5, -1, -1):
+        for decks in DECKS:
+            cards = KNOWN[:known]
+            result += [
+                Case("Statistics.handDistribution(%d, %d)" % (known, decks),
+                     lambda c=cards, d=decks: Statistics.handDistribution(c, d), full=known < 2),
+                Case("Statistics.expectedValue(%d, %d)" % (known, decks),
+                     lambda c=cards, d=decks: Statistics.expectedValue(
+                         c, Statistics.handDistribution(c, d)), full=known < 2)
+            ]
+    return result
+
+
+def measure(case: Case) -> float:
+    """
+    Times a case.
+
+    Arguments:
+        case {Case} -- Case to time.
+
+    Returns:
+        float -- Fastest time per operation, in seconds.
+    """
+    loops = 1
+    while True:
+        elapsed = _sample(case.run, loops)
+        if elapsed >= MIN_TIME:
+            break
+        loops *= max(2, min(10, int(MIN_TIME / max(elapsed, 1e-9)) + 1))
+    best = elapsed
+    # Heavy cases already took MIN_TIME once, a single extra sample is enough
+    for _ in range(REPEAT - 1 if loops > 1 else 1):
+        best = min(best, _sample(case.run, loops))
+    return best / loops / case.ops
+
+
+def run(selected: List[Case], baseline: Dict[str, float]=None, out=None) -> List[Result]:
+    """
+    Times cases and compares them against a baseline.
+
+    Arguments:
+        selected {List[Case]} -- Cases to time.
+
+    Keyword Arguments:
+        baseline {Dict[str, float]} -- Seconds per operation by case name. (default: {None})
+        out -- Stream progress is printed to. (default: {None})
+
+    Returns:
+        List[Result] -- Result of each case.
+    """
+    baseline = baseline or dict()
+    results = []
+    for case in selected:
+        result = Result(case.name, measure(case), baseline.get(case.name))
+        results.append(result)
+        if out:
+            print(result, file=out, flush=True)
+    return results
+
+
+def regressions(results: List[Result], threshold: float) -> List[Result]:
+    """
+    Arguments:
+        results {List[Result]} -- Compared results.
+        threshold {float} -- Largest allowed slowdown, 0.2 allows 20% slower.
+
+    Returns:
+        List[Result] -- Results slower than their baseline by more than the threshold.
+    """
+    return [r for r in results if r.ratio is not None and r.ratio > 1 + threshold]
+
+
+def report(results: List[Result]) -> dict:
+    """
+    Arguments:
+        results {List[Result]} -- Results to report.
+
+    Returns:
+        dict -- Machine readable results, also the format of a baseline.
+    """
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {r.name: r.seconds for r in results}
+    }
+
+
+def _sample(function: Callable[[], object], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        function()
+    return time.perf_counter() - start
+
+
+def _deal(deck: Deck) -> List[Card]:
+    return [deck.draw() for _ in range(5)]
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return "%.3f %s" % (seconds / scale, unit)
+    return "%.1f ns" % (seconds / 1e-9)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the Let it Ride game logic.")
+    parser.add_argument("--full", action="store_true", help="include the cases that take seconds each")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when a case is this much slower than the baseline (0.25 is 25%%)")
+    parser.add_argument("--save", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    selected = [c for c in cases() if (args.full or not c.full) and args.filter in c.name]
+    results = run(selected, baseline, sys.stdout)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report(results), f, indent=2, sort_keys=True)
+    slower = regressions(results, args.threshold)
+    if slower:
+        print("%d case(s) regressed more than %d%%:" % (len(slower), args.threshold * 100))
+        for result in slower:
+            print("  " + str(result))
+        sys.exit(1)
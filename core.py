@@ -3,6 +3,7 @@ from enum import Enum
 from typing import List
 import itertools
 import math
+import bisect
     
 class Suit(Enum):
     """
@@ -116,6 +117,15 @@ class Card:
 
         return "./assets/" + str(self.rank) + str(self.Suit) + ".png"
 
+    @property
+    def index(self) -> int:
+        """
+        Returns:
+            int -- Position of card in a single 52 card deck, ordered by suit 
+                then rank.
+        """
+        return (self._Suit.value - 1) * 13 + self._rank - 1
+
     def __eq__(self, other: 'Card') -> bool:
         return self.rank == other.rank and self.Suit == other.Suit
 
@@ -223,15 +233,12 @@ class Hand:
         Returns:
             HandType -- Type of hand.
         """
-        hand = self._cards.copy()
-        hand.sort()
-        size = len(hand)
-            
         royals = [1, 10, 11, 12, 13]
-        ranks = [card.rank for card in hand]
+        ranks = sorted([card.rank for card in self._cards])
+        suit = self._cards[0].Suit
         is_royal = ranks == royals
         is_straight = ranks == list(range(ranks[0], ranks[-1] + 1)) or is_royal
-        is_flush = len([c for c in hand if c.Suit == hand[0].Suit]) == size
+        is_flush = all(card.Suit == suit for card in self._cards)
 
         if is_royal and is_flush:
             return HandType.royal_flush
@@ -242,9 +249,9 @@ class Hand:
         if is_flush:
             return HandType.flush
 
-        count_map = {
-            c.rank: len([c2 for c2 in hand if c2.rank == c.rank]) for c in hand
-        }
+        count_map = dict()
+        for rank in ranks:
+            count_map[rank] = count_map.get(rank, 0) + 1
         counts = list(count_map.values())
 
         if counts.count(4) == 1:
@@ -256,7 +263,7 @@ class Hand:
         if counts.count(2) == 2:
             return HandType.two_pair
         if counts.count(2) == 1:
-            if [c for c in hand if c.rank in royals and count_map[c.rank] == 2]:
+            if [r for r in royals if count_map.get(r) == 2]:
                 return HandType.high_pair
             else:
                 return HandType.pair
@@ -349,6 +356,30 @@ class Deck:
         """
         random.shuffle(self._cards)
 
+    def count(self, card: Card) -> int:
+        """
+        Counts the copies of a card left in the deck.
+
+        Arguments:
+            card {Card} -- Card to count.
+
+        Returns:
+            int -- Number of copies of the card.
+        """
+        return self._cards.count(card)
+
+    def remove(self, card: Card):
+        """
+        Removes a known card from the deck.
+
+        Arguments:
+            card {Card} -- Card to remove.
+
+        Raises:
+            ValueError -- Raised if the card is not in the deck.
+        """
+        self._cards.remove(card)
+
     def __len__(self):
         return len(self._cards)
 
@@ -362,11 +393,236 @@ class Deck:
         return deck
 
 
+class CountDeck(Deck):
+    """
+    Class representing a deck as the number of copies left of each card.
+    Removing a card is O(1) and memory does not grow with the deck count.
+    """
+    CARDS = [Card(i % 13 + 1, Suit(i // 13 + 1)) for i in range(52)]
+
+    def __init__(self, count: int=1):
+        """
+        Create a deck of cards with a specified deck size.
+
+        Keyword Arguments:
+            count {int} -- Size of deck (default: {1})
+        """
+        self._infinite = count >= 100
+        self._counts = [1 if self._infinite else count] * 52
+        self._total = sum(self._counts)
+        self._cumulative = None
+
+    @property
+    def cards(self) -> List[Card]:
+        """
+        Returns:
+            List[Card] -- List of cards in deck, built from the counts.
+        """
+        return [
+            card for card, n in zip(CountDeck.CARDS, self._counts)
+            for _ in range(n)
+        ]
+
+    @property
+    def composition(self) -> List[int]:
+        """
+        Returns:
+            List[int] -- Copies left of each card, indexed by Card.index.
+        """
+        return list(self._counts)
+
+    def draw(self) -> Card:
+        """
+        Draws a random card, weighted by the copies left of each card.
+
+        Returns:
+            Card -- Drawn card.
+
+        Raises:
+            IndexError -- Raised if the deck is empty.
+        """
+        if self._total <= 0:
+            raise IndexError("Cannot draw from an empty deck")
+        if self._cumulative is None:
+            self._cumulative = list(itertools.accumulate(self._counts))
+        i = bisect.bisect_right(self._cumulative, random.randrange(self._total))
+        if not self._infinite:
+            self._take(i)
+        return CountDeck.CARDS[i]
+
+    def shuffle(self):
+        """
+        Does nothing, draws are already random.
+        """
+        pass
+
+    def count(self, card: Card) -> int:
+        """
+        Counts the copies of a card left in the deck.
+
+        Arguments:
+            card {Card} -- Card to count.
+
+        Returns:
+            int -- Number of copies of the card.
+        """
+        return self._counts[card.index]
+
+    def remove(self, card: Card):
+        """
+        Removes a known card from the deck.
+
+        Arguments:
+            card {Card} -- Card to remove.
+
+        Raises:
+            ValueError -- Raised if the card is not in the deck.
+        """
+        if self._counts[card.index] == 0:
+            raise ValueError("Card is not in the deck")
+        self._take(card.index)
+
+    def _take(self, i: int):
+        self._counts[i] -= 1
+        self._total -= 1
+        self._cumulative = None
+
+    def __len__(self):
+        return self._total
+
+
+class Shoe(Deck):
+    """
+    Class representing a multi-deck shoe. The shoe is dealt through until the
+    cut card is reached instead of being rebuilt for every hand.
+    """
+    def __init__(self, count: int=1, penetration: float=0.75):
+        """
+        Create a shuffled shoe with a specified deck count.
+
+        Keyword Arguments:
+            count {int} -- Number of decks in the shoe. (default: {1})
+            penetration {float} -- Fraction of the shoe dealt before the cut
+                card comes out. (default: {0.75})
+
+        Raises:
+            ValueError -- Raised if the penetration is not in (0, 1].
+        """
+        if not 0 < penetration <= 1:
+            raise ValueError("Penetration must be between 0 and 1")
+        Deck.__init__(self, count)
+        self._decks = count if not self._infinite else 1
+        self._penetration = penetration
+        # Cards are dealt from the end of the list, everything before
+        # _remaining is still in the shoe.
+        self._cut = len(self._cards) - int(len(self._cards) * penetration)
+        self.reshuffle()
+
+    @property
+    def cards(self) -> List[Card]:
+        """
+        Returns:
+            List[Card] -- List of cards left in the shoe.
+        """
+        return self._cards[:self._remaining]
+
+    @property
+    def composition(self) -> List[int]:
+        """
+        Returns:
+            List[int] -- Copies left of each card, indexed by Card.index.
+        """
+        return list(self._counts)
+
+    @property
+    def penetration(self) -> float:
+        """
+        Returns:
+            float -- Fraction of the shoe dealt before reshuffling.
+        """
+        return self._penetration
+
+    @property
+    def needs_shuffle(self) -> bool:
+        """
+        Returns:
+            bool -- True once the cut card has been reached.
+        """
+        return self._remaining <= self._cut
+
+    def draw(self) -> Card:
+        """
+        Draws a card from the top of the shoe.
+
+        Returns:
+            Card -- Drawn card.
+        """
+        if (self._infinite):
+            return random.choice(self._cards)
+        self._remaining -= 1
+        card = self._cards[self._remaining]
+        self._counts[card.index] -= 1
+        return card
+
+    def shuffle(self):
+        """
+        Shuffles the cards left in the shoe.
+        """
+        remaining = self._cards[:self._remaining]
+        random.shuffle(remaining)
+        self._cards[:self._remaining] = remaining
+
+    def reshuffle(self):
+        """
+        Returns every dealt card to the shoe and shuffles it.
+        """
+        random.shuffle(self._cards)
+        self._remaining = len(self._cards)
+        self._counts = [self._decks] * 52
+
+    def count(self, card: Card) -> int:
+        """
+        Counts the copies of a card left in the shoe.
+
+        Arguments:
+            card {Card} -- Card to count.
+
+        Returns:
+            int -- Number of copies of the card.
+        """
+        return self._counts[card.index]
+
+    def remove(self, card: Card):
+        """
+        Removes a known card from the shoe.
+
+        Arguments:
+            card {Card} -- Card to remove.
+
+        Raises:
+            ValueError -- Raised if the card is not in the shoe.
+        """
+        if (self._infinite):
+            return
+        if self._counts[card.index] == 0:
+            raise ValueError("Card is not in the shoe")
+        i = self._cards.index(card, 0, self._remaining)
+        self._remaining -= 1
+        self._cards[i], self._cards[self._remaining] = \
+            self._cards[self._remaining], self._cards[i]
+        self._counts[card.index] -= 1
+
+    def __len__(self):
+        return self._remaining
+
+
 class Game:
     """
     Class representing a Let it Ride game.
     """
-    def __init__(self, decks: int = 1, name: str="Player", money: int = 1000):
+    def __init__(
+            self, decks: int = 1, name: str="Player", money: int = 1000,
+            shoe: bool=False, penetration: float=0.75):
         """
         Creates an instance of a game.
         
@@ -374,10 +630,16 @@ class Game:
             decks {int} -- Number of card decks to use. (default: {1})
             name {str} -- Name of player (default: {"Player"})
             money {int} -- Starting bankroll of player. (default: {1000})
+            shoe {bool} -- Deal every hand from one shoe instead of a fresh 
+                deck. (default: {False})
+            penetration {float} -- Fraction of the shoe dealt before it is 
+                reshuffled. (default: {0.75})
         """
         self._deck_count = decks
-        self._deck = Deck(decks)
+        self._shoe = shoe
+        self._deck = Shoe(decks, penetration) if shoe else CountDeck(decks)
         self._player = Player(self, name, money)
+        self._known_cards = []
         self.deck.shuffle()
 
     @property
@@ -387,6 +649,14 @@ class Game:
             Deck -- Game deck.
         """
         return self._deck
+
+    @property
+    def shoe(self) -> bool:
+        """
+        Returns:
+            bool -- True if hands are dealt from a persistent shoe.
+        """
+        return self._shoe
     
     @property
     def player(self) -> 'Player':
@@ -395,14 +665,106 @@ class Game:
             [Player] -- Game player.
         """
         return self._player
+
+    @property
+    def known_cards(self) -> List[Card]:
+        """
+        Returns:
+            List[Card] -- Cards the next deal starts with when it is given none.
+        """
+        return self._known_cards
+
+    @known_cards.setter
+    def known_cards(self, cards: List[Card]):
+        self._known_cards = list(cards)
     
-    def deal(self):
+    def deal(self, cards: List[Card]=None):
         """
         Deal 5 cards into the player's hand.
+
+        Keyword Arguments:
+            cards {List[Card]} -- Known cards to start the hand with, the rest
+                are drawn from the deck. Defaults to the known cards, which
+                only apply to one deal. (default: {None})
+        """
+        cards = list(cards) if cards else self._known_cards
+        self._known_cards = []
+        if (self._shoe):
+            if (self._deck.needs_shuffle or len(self._deck) < 5):
+                self._deck.reshuffle()
+        else:
+            self._deck = CountDeck(self._deck_count)
+        for card in cards:
+            # A card already dealt from the shoe stays out of it.
+            if self._deck.count(card) > 0:
+                self._deck.remove(card)
+        self.player.hand = Hand(
+            cards + [self._deck.draw() for _ in range(5 - len(cards))])
+
+    def unseen_composition(self, cards: List[Card]) -> List[int]:
+        """
+        Counts the cards the player has not seen when playing from a shoe.
+
+        Arguments:
+            cards {List[Card]} -- Cards of the hand visible to the player.
+
+        Returns:
+            List[int] -- Copies of each card left in the shoe or still face
+                down, indexed by Card.index.
+        """
+        composition = self._deck.composition
+        # Cards still face down came out of the shoe but are unknown to the player
+        for card in self.player.hand.cards[len(cards):]:
+            composition[card.index] += 1
+        return composition
+
+    def should_ride(self, hand: Hand, stage: int) -> bool:
+        """
+        Decides whether to ride using the expected value of the visible cards.
+
+        Arguments:
+            hand {Hand} -- Cards visible at this stage.
+            stage {int} -- Stage of the round (1 or 2).
+
+        Returns:
+            bool -- True if the bet should be ridden.
+        """
+        if (self._shoe and self._deck_count < 100):
+            distribution = Statistics.compositionDistribution(
+                hand.cards, self.unseen_composition(hand.cards))
+            return Statistics.expectedValue(hand.cards, distribution) >= 0
+        decks = self._deck_count if self._deck_count < 100 else math.inf
+        return Statistics.memoExpectedValue(hand.cards, decks) >= 0
+
+    def play(self, bet: int, side_bet: int=0, ride=None) -> int:
+        """
+        Plays a full round without waiting on the player.
+
+        Arguments:
+            bet {int} -- Individual bet amount.
+
+        Keyword Arguments:
+            side_bet {int} -- Side bet amount. (default: {0})
+            ride {Callable[[Hand, int], bool]} -- Strategy deciding whether 
+                to ride given the visible cards and the stage. 
+                (default: {Game.should_ride})
+
+        Returns:
+            int -- Change in the player's bankroll.
         """
-        self._deck = Deck(self._deck_count) # We may want to change this logic.
-        self._deck.shuffle()
-        self.player.hand = Hand([self._deck.draw() for _ in range(5)])
+        ride = ride or self.should_ride
+        player = self.player
+        start = player.money
+        self.deal()
+        player.bet(bet)
+        if (side_bet > 0):
+            player.side_bet(side_bet)
+            player.payout_side()
+        for stage in (1, 2):
+            if not ride(Hand(player.hand.cards[:stage + 2]), stage):
+                player.pull()
+        player.payout()
+        return player.money - start
 
 
 class Settings:
@@ -414,12 +776,15 @@ class Settings:
             player_name: str="Player", player_bankroll: int=1000, 
             game_decks: int=1, 
             background: str="./assets/felt3.png", 
-            card: str="./assets/card_back1.png"):
+            card: str="./assets/card_back1.png",
+            game_shoe: bool=False, shoe_penetration: float=0.75):
         self._player_name = player_name
         self._player_bankroll = player_bankroll
         self._game_decks = game_decks
         self._background = background
         self._card = card
+        self._game_shoe = game_shoe
+        self._shoe_penetration = shoe_penetration
     
     """
     Gets the name of the player
@@ -462,6 +827,20 @@ class Settings:
     @property
     def card(self):
         return self._card
+
+    """
+    Gets whether hands are dealt from a persistent shoe
+    """
+    @property
+    def game_shoe(self):
+        return self._game_shoe
+
+    """
+    Gets the fraction of the shoe dealt before the cut card
+    """
+    @property
+    def shoe_penetration(self):
+        return self._shoe_penetration
     
 
 class Player:
@@ -635,12 +1014,59 @@ class Statistics:
                 ev -= v/possibilities
         return ev
 
+    """
+    Returns the expected value of a hand drawn from fresh decks, caching
+    results. Fresh decks look the same under any relabelling of the suits,
+    so a hand is keyed by the sorted ranks held in each suit, whatever the
+    suit is
+    """
+    _evCache = dict()
+
+    @staticmethod
+    def memoExpectedValue(cards, numDecks: int=1) -> float:
+        suits = dict()
+        for c in cards:
+            suits.setdefault(c.Suit, []).append(c.rank)
+        key = (numDecks,) + tuple(sorted(tuple(sorted(ranks)) for ranks in suits.values()))
+        if key not in Statistics._evCache:
+            if len(Statistics._evCache) >= 100000:
+                Statistics._evCache.clear()
+            Statistics._evCache[key] = Statistics.expectedValue(
+                cards, Statistics.handDistribution(cards, numDecks))
+        return Statistics._evCache[key]
+
     """
     Generates the hand distribution for a given set of cards
     with a certain number of decks. Defaults to 1 deck
     """
     @staticmethod
     def handDistribution(cards, numDecks: int=1) -> dict:
+        decks = numDecks if numDecks < 100 else 1
+        dead = cards if numDecks != math.inf else []
+        return Statistics.compositionDistribution(
+            cards, Statistics.remainingComposition(decks, dead))
+
+    """
+    Returns the copies left of each card, indexed by Card.index, once a list
+    of dead cards has been taken out of a number of fresh decks
+    """
+    @staticmethod
+    def remainingComposition(numDecks: int=1, deadCards: List[Card]=[]) -> List[int]:
+        composition = [numDecks] * 52
+        for card in deadCards:
+            if composition[card.index] == 0:
+                raise ValueError("Too many copies of " + str(card))
+            composition[card.index] -= 1
+        return composition
+
+    """
+    Generates the hand distribution for a given set of cards when the
+    unseen cards come from an arbitrary remaining composition. Each group
+    of unseen cards is counted once and weighted by the number of ways it
+    can be drawn, so the counts match enumerating the physical cards
+    """
+    @staticmethod
+    def compositionDistribution(cards, composition: List[int]) -> dict:
         choose = 5-len(cards)
         results = dict()
         for t in HandType:
@@ -648,12 +1074,25 @@ class Statistics:
         if (choose <= 0):
             results[Hand(cards).type] = 1
             return results
-        deck = Deck(numDecks).cards
-        if (numDecks != math.inf):
-            for card in cards:
-                deck.remove(card)
-        for n in itertools.combinations(deck, choose):
-            hand = Hand(cards + list(n))
-            results[hand.type] += 1
+        available = [i for i, n in enumerate(composition) if n > 0]
+        if max(composition) == 1:
+            # Every card is unique so every group is drawn exactly one way.
+            for n in itertools.combinations(available, choose):
+                hand = Hand(cards + [CountDeck.CARDS[i] for i in n])
+                results[hand.type] += 1
+            return results
+        for n in itertools.combinations_with_replacement(available, choose):
+            weight = 1
+            for i, group in itertools.groupby(n):
+                weight *= Statistics._choose(composition[i], len(list(group)))
+            if weight:
+                hand = Hand(cards + [CountDeck.CARDS[i] for i in n])
+                results[hand.type] += weight
         return results
-            
+
+    @staticmethod
+    def _choose(n: int, k: int) -> int:
+        ways = 1
+        for i in range(k):
+            ways = ways * (n - i) // (i + 1)
+        return ways
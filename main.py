@@ -1,20 +1,83 @@
 import sys
-from screen import MainMenu
+import time
+import argparse
+import os
+import random
+import tracing
+from replay import Recorder
+from screen import MainMenu, AssetLoader, ScreenManager, EventDispatcher, PerformanceHud
+from core import Settings
 import pygame
 
+IDLE_TIMEOUT = 1000 # Longest wait for an event while nothing is animating, in ms
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Let it Ride poker.")
+    parser.add_argument("--fps", type=int, default=60, help="frame rate cap")
+    parser.add_argument("--hud", action="store_true", help="start with the performance HUD shown (toggle with F3)")
+    parser.add_argument("--trace", metavar="PATH", default=os.environ.get(tracing.ENV),
+                        help="write a Chrome trace of the hot paths to PATH on exit (or set %s)" % tracing.ENV)
+    parser.add_argument("--record", metavar="PATH", help="record the session's input to PATH for replay.py")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the deals (random when recording without one)")
+    args = parser.parse_args()
+    if args.record and args.seed == None:
+        args.seed = random.randrange(2 ** 32)
+    if args.seed != None:
+        random.seed(args.seed)
+    if args.trace:
+        tracing.enable(args.trace)
+
     print("MATH 3808 Final Project")
 
     pygame.init()
     canvas = pygame.display.set_mode((1200, 675))
-    screen = MainMenu()
+    EventDispatcher.filter()
+    clock = pygame.time.Clock()
+    recorder = Recorder(args.record, args.seed) if args.record else None
+    screen = ScreenManager.get(Settings(), MainMenu)
+    if recorder:
+        # Replays start with every texture loaded, so recordings do too
+        AssetLoader.finish()
+    hud = PerformanceHud()
+    if args.hud:
+        hud.handle(pygame.event.Event(pygame.KEYDOWN, key=PerformanceHud.KEY))
+    changed = True
 
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-            screen.handle(event)
-        screen.update()
-        screen.draw(canvas)
-        pygame.display.flip()
-        screen = screen.next()
+        if changed or screen.animating or AssetLoader.loading() or hud.visible:
+            # The HUD keeps the frame cap running so its frame rate and timings stay current
+            events = pygame.event.get()
+        else:
+            # Block until input arrives instead of redrawing an idle table
+            events = [pygame.event.wait(IDLE_TIMEOUT)] + pygame.event.get()
+        if recorder:
+            recorder.frame(events)
+        start = time.perf_counter()
+        with tracing.span("frame.handle"):
+            for event in events:
+                if event.type == pygame.QUIT:
+                    sys.exit()
+                if event.type == pygame.VIDEOEXPOSE:
+                    screen.invalidate()
+                elif event.type != pygame.NOEVENT and not hud.handle(event):
+                    screen.handle(event)
+        handled = time.perf_counter()
+        with tracing.span("frame.update"):
+            AssetLoader.pump()
+            screen.update()
+        updated = time.perf_counter()
+        with tracing.span("frame.draw"):
+            hud.restore(canvas)
+            rects = screen.draw(canvas)
+            hud.record(handled - start, updated - handled, time.perf_counter() - updated)
+            hud_rects = hud.draw(canvas, screen, clock.get_fps())
+        with tracing.span("frame.present"):
+            if rects is None:
+                pygame.display.flip()
+            elif rects or hud_rects:
+                pygame.display.update(rects + hud_rects)
+        previous, screen = screen, screen.next()
+        changed = screen is not previous
+        if changed:
+            screen.invalidate()
+        clock.tick(args.fps)
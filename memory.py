@@ -0,0 +1,365 @@
+"""
+Measures the memory footprint of the game with tracemalloc and checks it
+against budgets.
+
+Each case reports the bytes it measured and the source lines that
+allocated most of them. The script exits with an error when a case goes
+over its budget, so several tables can share a box without surprises.
+
+Textures are pixel buffers allocated by SDL, which tracemalloc does not
+see, so the texture case adds up the pixel bytes of the cached surfaces
+after a replay of every screen instead. The autoplay cases measure how
+much the Python heap grows between the end of a warm up and the end of a
+session, which should stay near zero however long the session is.
+
+The distributions with fewer than 3 known cards and the long autoplay
+session take a while under tracemalloc, so they only run with --full.
+
+Run it with:
+    python memory.py
+    python memory.py --full --budgets budgets.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from core import Card, CountDeck, Deck, Settings, Statistics, Suit
+
+KiB = 1024
+MiB = 1024 * KiB
+TOP = 5 # Allocation sites reported for each case
+FRAMES = 1 # Stack frames kept by tracemalloc, only the allocating line is reported
+AUTOPLAY_FRAMES = 1500 # Frames of the autoplay session, about 75 hands
+AUTOPLAY_WARMUP = 500 # Frames played before the heap is first measured
+AUTOPLAY_STEP = 50 # Milliseconds between autoplay frames
+AUTOPLAY_SEED = 0 # Seed of the autoplay deals, so every run plays the same hands
+KNOWN = [Card(3, Suit.clubs), Card(3, Suit.spades), Card(10, Suit.clubs), Card(12, Suit.hearts)]
+
+"""
+Budgets in bytes of each case, a case without one is only reported
+"""
+BUDGETS = {
+    "Deck(1)": 8 * KiB,
+    "Deck(8)": 64 * KiB,
+    "Deck(50)": 384 * KiB,
+    "Deck(99)": 768 * KiB,
+    "CountDeck(1)": 2 * KiB,
+    "CountDeck(8)": 2 * KiB,
+    "CountDeck(50)": 2 * KiB,
+    "CountDeck(99)": 2 * KiB,
+    "Statistics.handDistribution(3, 1) peak": 32 * KiB,
+    "Statistics.handDistribution(3, 8) peak": 32 * KiB,
+    "Statistics.handDistribution(2, 1) peak": 32 * KiB,
+    "Statistics.handDistribution(2, 8) peak": 32 * KiB,
+    "Statistics.handDistribution(1, 1) peak": 32 * KiB,
+    "Statistics.handDistribution(1, 8) peak": 32 * KiB,
+    "Textures after every screen": 48 * MiB,
+    "Autoplay heap growth": 64 * KiB,
+    # The tables of bounded caches such as TextCache resize as their entries are replaced
+    "Autoplay heap growth, long session": 128 * KiB
+}
+
+
+class Case:
+    """
+    Class representing a measured piece of code.
+    """
+    def __init__(self, name: str, run: Callable[[], Tuple[int, List[str]]], full: bool=False):
+        """
+        Arguments:
+            name {str} -- Name of the case, also the key of its budget.
+            run {Callable[[], Tuple[int, List[str]]]} -- Measures the case,
+                returning the bytes and the top allocation sites.
+
+        Keyword Arguments:
+            full {bool} -- True if the case only runs in the full suite. (default: {False})
+        """
+        self.name = name
+        self.run = run
+        self.full = full
+
+
+class Result:
+    """
+    Class representing the bytes a case measured and its budget.
+    """
+    def __init__(self, name: str, size: int, sites: List[str], budget: int=None):
+        """
+        Arguments:
+            name {str} -- Name of the case.
+            size {int} -- Bytes measured.
+            sites {List[str]} -- Top allocation sites.
+
+        Keyword Arguments:
+            budget {int} -- Most bytes allowed. (default: {None})
+        """
+        self.name = name
+        self.size = size
+        self.sites = sites
+        self.budget = budget
+
+    @property
+    def over(self) -> bool:
+        """
+        Returns:
+            bool -- True if the case is over its budget.
+        """
+        return self.budget != None and self.size > self.budget
+
+    def __str__(self) -> str:
+        budget = _format(self.budget) if self.budget != None else "-"
+        line = "%-40s %12s %12s  %s" % (self.name, _format(self.size), budget, "OVER" if self.over else "ok")
+        return "\n".join([line] + ["    " + site for site in self.sites])
+
+
+def retained(build: Callable[[], object]) -> Tuple[int, List[str]]:
+    """
+    Measures the memory held by an object once it is built.
+
+    Arguments:
+        build {Callable[[], object]} -- Builds the object.
+
+    Returns:
+        Tuple[int, List[str]] -- Bytes held and the top allocation sites.
+    """
+    before = _start()
+    kept = build()
+    after = _snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return size, _sites(after, before)
+
+
+def peak(run: Callable[[], object]) -> Tuple[int, List[str]]:
+    """
+    Measures the most memory in use at once while code runs, on top of what
+    was in use before. The sites are those of the memory still held at the end.
+
+    Arguments:
+        run {Callable[[], object]} -- Code to measure.
+
+    Returns:
+        Tuple[int, List[str]] -- Peak bytes and the top allocation sites.
+    """
+    _start()
+    # Restarting clears the traces and the peak, tracemalloc.reset_peak needs Python 3.9
+    tracemalloc.stop()
+    tracemalloc.start(FRAMES)
+    before = tracemalloc.take_snapshot()
+    base = tracemalloc.get_traced_memory()[0]
+    result = run()
+    size = tracemalloc.get_traced_memory()[1] - base
+    after = _snapshot()
+    tracemalloc.stop()
+    del result
+    return size, _sites(after, before)
+
+
+def textures() -> Tuple[int, List[str]]:
+    """
+    Replays the built in tour of every screen and adds up the pixels of the
+    cached surfaces, a surface shared by several caches counted once.
+
+    Returns:
+        Tuple[int, List[str]] -- Pixel bytes and the bytes of each cache.
+    """
+    import replay
+    from screen import LayerCache, TextCache, TextureAtlas, TextureManager
+    canvas = _display()
+    replay.replay(replay.tour(), canvas)
+    caches = [
+        ("TextureAtlas.surface", [TextureAtlas.surface] if TextureAtlas.surface != None else []),
+        ("TextureManager.textures", list(TextureManager.textures.values())),
+        ("TextureManager.scaled_textures", list(TextureManager.scaled_textures.values())),
+        ("LayerCache.layers", list(LayerCache.layers.values())),
+        ("TextCache.surfaces", list(TextCache.surfaces.values()))
+    ]
+    seen = set()
+    total = 0
+    sites = []
+    for name, surfaces in caches:
+        size = 0
+        for surface in surfaces:
+            # Subsurfaces share the pixels of their parent
+            if surface.get_parent() == None and id(surface) not in seen:
+                seen.add(id(surface))
+                size += surface.get_pitch() * surface.get_height()
+        total += size
+        sites.append("%-32s %5d surfaces %12s" % (name, len(surfaces), _format(size)))
+    return total, sites
+
+
+def autoplay(frames: int=AUTOPLAY_FRAMES, warmup: int=AUTOPLAY_WARMUP) -> Tuple[int, List[str]]:
+    """
+    Autoplays the game screen and measures how much the heap grew after the
+    warm up. Frames are AUTOPLAY_STEP apart on a frozen clock, so cards deal
+    without waiting on the wall clock, and the deals are seeded. Tracing
+    starts before the bounded caches are filled to their size, so entries
+    they replace later are seen leaving and a full cache is not counted as
+    growth.
+
+    Keyword Arguments:
+        frames {int} -- Frames to play after the warm up. (default: {AUTOPLAY_FRAMES})
+        warmup {int} -- Frames to play first. (default: {AUTOPLAY_WARMUP})
+
+    Returns:
+        Tuple[int, List[str]] -- Bytes the heap grew by and the top growing sites.
+    """
+    from replay import FrameClock
+    from screen import GameScreen
+    canvas = _display()
+    random.seed(AUTOPLAY_SEED)
+    FrameClock.install()
+    try:
+        screen = GameScreen(Settings(player_bankroll=10 ** 9))
+        screen.add_bet(5)
+        screen.autoplay()
+        _start()
+        _fill_caches()
+        play = lambda count: [_frame(screen, canvas) for _ in range(count)]
+        play(warmup)
+        before = _snapshot()
+        play(frames)
+        after = _snapshot()
+        tracemalloc.stop()
+    finally:
+        FrameClock.uninstall()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")), _sites(after, before)
+
+
+def cases() -> List[Case]:
+    """
+    Returns:
+        List[Case] -- Every case, including the full suite ones.
+    """
+    result = []
+    for decks in [1, 8, 50, 99]:
+        result += [
+            Case("Deck(%d)" % decks, lambda d=decks: retained(lambda: Deck(d))),
+            Case("CountDeck(%d)" % decks, lambda d=decks: retained(lambda: CountDeck(d)))
+        ]
+    for known in [3, 2, 1]:
+        for decks in [1, 8]:
+            result.append(Case(
+                "Statistics.handDistribution(%d, %d) peak" % (known, decks),
+                lambda k=known, d=decks: peak(lambda: Statistics.handDistribution(KNOWN[:k], d)),
+                full=known < 3))
+    result += [
+        Case("Textures after every screen", textures),
+        Case("Autoplay heap growth", autoplay),
+        Case("Autoplay heap growth, long session", lambda: autoplay(4 * AUTOPLAY_FRAMES), full=True)
+    ]
+    return result
+
+
+def run(selected: List[Case], budgets: Dict[str, int]=BUDGETS, out=None) -> List[Result]:
+    """
+    Measures cases and checks them against their budgets.
+
+    Arguments:
+        selected {List[Case]} -- Cases to measure.
+
+    Keyword Arguments:
+        budgets {Dict[str, int]} -- Bytes allowed by case name. (default: {BUDGETS})
+        out -- Stream results are printed to. (default: {None})
+
+    Returns:
+        List[Result] -- Result of each case.
+    """
+    results = []
+    for case in selected:
+        size, sites = case.run()
+        result = Result(case.name, size, sites, budgets.get(case.name))
+        results.append(result)
+        if out:
+            print(result, file=out, flush=True)
+    return results
+
+
+def _start() -> tracemalloc.Snapshot:
+    # Compile the filters before tracing starts, so they do not count as allocations
+    tracemalloc.start(FRAMES)
+    _snapshot()
+    tracemalloc.stop()
+    gc.collect()
+    tracemalloc.start(FRAMES)
+    return _snapshot()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>")
+    ])
+
+
+def _sites(after: tracemalloc.Snapshot, before: tracemalloc.Snapshot) -> List[str]:
+    stats = [stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0]
+    return ["%s:%d %s in %d blocks" % (
+        os.path.relpath(stat.traceback[0].filename), stat.traceback[0].lineno,
+        _format(stat.size_diff), stat.count_diff) for stat in stats[:TOP]]
+
+
+def _display():
+    import pygame
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    if pygame.display.get_surface() == None:
+        pygame.init()
+        pygame.display.set_mode((1200, 675))
+    return pygame.display.get_surface()
+
+
+def _frame(screen, canvas):
+    from replay import FrameClock
+    FrameClock.ticks += AUTOPLAY_STEP
+    screen.update()
+    screen.draw(canvas)
+
+
+def _fill_caches():
+    from screen import CardObject, FontManager, TextCache
+    for card in CountDeck.CARDS:
+        CardObject(0, 0, card).flip()
+    font = FontManager.load("Times", 20)
+    for i in range(TextCache.SIZE):
+        TextCache.render(font, "%d" % i, (0, 0, 0))
+
+
+def _format(size: int) -> str:
+    for unit, scale in [("MiB", MiB), ("KiB", KiB)]:
+        if abs(size) >= scale:
+            return "%.1f %s" % (size / scale, unit)
+    return "%d B" % size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the memory footprint of Let it Ride against budgets.")
+    parser.add_argument("--full", action="store_true", help="include the cases that take seconds each")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--budgets", help="JSON file of budgets in bytes by case name, over the built in ones")
+    parser.add_argument("--json", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    if args.budgets:
+        with open(args.budgets) as f:
+            budgets.update(json.load(f))
+    selected = [c for c in cases() if (args.full or not c.full) and args.filter in c.name]
+    results = run(selected, budgets, sys.stdout)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({r.name: {"bytes": r.size, "budget": r.budget, "sites": r.sites} for r in results},
+                      f, indent=2, sort_keys=True)
+    over = [r for r in results if r.over]
+    if over:
+        print("%d case(s) over budget: %s" % (len(over), ", ".join(r.name for r in over)))
+        sys.exit(1)
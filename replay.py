@@ -0,0 +1,293 @@
+"""
+Records the input of a game session and replays it headless to time every frame.
+
+A recording holds the seed of the session and, for every frame, the ticks
+it started at and the events it handled. The replay seeds the game the
+same way, converts every texture up front, and shows each frame the ticks
+it was recorded with, so cards deal and autoplay plays out exactly as it
+did. Turbo plays as many hands as fit in a wall clock budget, so sessions
+using it do not repeat exactly.
+
+Frame times are reported for each screen, and for each mode of the game
+screen such as autoplay or the probability overlay.
+
+Record a session, then replay it without a display:
+    python main.py --record session.jsonl
+    python replay.py session.jsonl --json timings.json
+Without a recording, a built in tour of every screen is replayed.
+"""
+import argparse
+import atexit
+import json
+import os
+import random
+import time
+from typing import Dict, List
+import pygame
+from pygame import Surface
+from pygame.event import Event
+from core import Settings
+from screen import AssetLoader, MainMenu, PerformanceHud, Screen, ScreenManager
+
+VERSION = 1
+SIZE = (1200, 675)
+TOUR_FRAME = 1000 / 60 # Milliseconds between the frames of the built in tour
+
+
+class FrameClock:
+    """
+    Freezes pygame.time.get_ticks at the start of each frame, so a session
+    and its replay see the same time on the same frame.
+    """
+    ticks = 0
+    get_ticks = pygame.time.get_ticks
+
+    @staticmethod
+    def install():
+        pygame.time.get_ticks = lambda: FrameClock.ticks
+
+    @staticmethod
+    def uninstall():
+        pygame.time.get_ticks = FrameClock.get_ticks
+
+
+class Recorder:
+    """
+    Class writing the events of each frame to a recording.
+    """
+    def __init__(self, path: str, seed: int):
+        """
+        Starts a recording, call it before the first screen is built.
+
+        Arguments:
+            path {str} -- File to write, one JSON object per line.
+            seed {int} -- Seed the game was started with.
+        """
+        FrameClock.install()
+        FrameClock.ticks = FrameClock.get_ticks()
+        self._file = open(path, "w")
+        self._write({"version": VERSION, "seed": seed, "ticks": FrameClock.ticks})
+        atexit.register(self.close)
+
+    def frame(self, events: List[Event]):
+        """
+        Records a frame, call it before the frame handles its events.
+
+        Arguments:
+            events {List[Event]} -- Events of the frame.
+        """
+        FrameClock.ticks = FrameClock.get_ticks()
+        self._write({"ticks": FrameClock.ticks, "events": [encode(e) for e in events if e.type != pygame.NOEVENT]})
+
+    def close(self):
+        """
+        Finishes the recording.
+        """
+        FrameClock.uninstall()
+        self._file.close()
+        atexit.unregister(self.close)
+
+    def _write(self, line: dict):
+        self._file.write(json.dumps(line) + "\n")
+
+
+class FrameTimes:
+    """
+    Class collecting frame times by the screen that drew them.
+    """
+    def __init__(self):
+        self.frames = dict()
+
+    def add(self, label: str, seconds: float):
+        """
+        Arguments:
+            label {str} -- Screen that drew the frame.
+            seconds {float} -- Time the frame took.
+        """
+        self.frames.setdefault(label, []).append(seconds)
+
+    def report(self) -> Dict[str, dict]:
+        """
+        Returns:
+            Dict[str, dict] -- Frame count and mean, median, 95th percentile
+                and longest frame in milliseconds of each screen.
+        """
+        report = dict()
+        for label, frames in self.frames.items():
+            ordered = sorted(frames)
+            report[label] = {
+                "frames": len(frames),
+                "mean": sum(frames) / len(frames) * 1000,
+                "p50": _percentile(ordered, 0.5) * 1000,
+                "p95": _percentile(ordered, 0.95) * 1000,
+                "max": ordered[-1] * 1000
+            }
+        return report
+
+    def __str__(self) -> str:
+        lines = ["%-26s %7s %9s %9s %9s %9s" % ("screen", "frames", "mean ms", "p50 ms", "p95 ms", "max ms")]
+        for label, row in sorted(self.report().items()):
+            lines.append("%-26s %7d %9.3f %9.3f %9.3f %9.3f" % (
+                label, row["frames"], row["mean"], row["p50"], row["p95"], row["max"]))
+        return "\n".join(lines)
+
+
+def encode(event: Event) -> dict:
+    """
+    Arguments:
+        event {Event} -- Event to record.
+
+    Returns:
+        dict -- Type and JSON friendly attributes of the event.
+    """
+    attributes = {k: (list(v) if isinstance(v, tuple) else v) for k, v in event.dict.items()
+                  if isinstance(v, (int, float, str, tuple))}
+    return {"type": event.type, "dict": attributes}
+
+
+def decode(recorded: dict) -> Event:
+    """
+    Arguments:
+        recorded {dict} -- Event as returned by encode.
+
+    Returns:
+        Event -- Recorded event.
+    """
+    return Event(recorded["type"], {k: (tuple(v) if isinstance(v, list) else v) for k, v in recorded["dict"].items()})
+
+
+def load(path: str) -> dict:
+    """
+    Arguments:
+        path {str} -- Recording to read.
+
+    Raises:
+        ValueError -- Raised if the recording is from another version.
+
+    Returns:
+        dict -- Header of the recording, with its frames in "frames".
+    """
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    recording = lines[0]
+    if recording.get("version") != VERSION:
+        raise ValueError("Recording version %s is not %d" % (recording.get("version"), VERSION))
+    recording["frames"] = lines[1:]
+    return recording
+
+
+def tour() -> dict:
+    """
+    Builds a recording that visits every screen: a hand on the table,
+    autoplay, the probability overlay, the card selector and the settings.
+
+    Returns:
+        dict -- Recording in the format returned by load.
+    """
+    steps = [
+        (30, [(600, 290)]), # Play
+        (30, [(240, 600)]), # $5 chip
+        (60, [(364, 525)]), # Make bet
+        (60, [(364, 525)]), # Ride
+        (60, [(364, 525)]), # Ride
+        (60, [(1100, 650)]), # Probability overlay
+        (60, [(825, 100)]), # Close it
+        (30, [(1100, 500)]), # Autoplay on
+        (600, [(1100, 500)]), # Autoplay off
+        (120, [(364, 525)] * 2), # Finish the hand
+        (60, [(1100, 550)]), # Card selector
+        (30, [(40 + 91 * i, 150) for i in range(5)]), # Select five cards
+        (30, [(140, 65)]), # Save cards
+        (30, [(240, 600), (364, 525)]), # Deal them
+        (90, [(60, 35)]), # Main menu
+        (30, [(600, 470)]), # Settings
+        (30, [(400, 555), (640, 430), (500 + 100 * 4, 300)]), # Shoe, card back and felt
+        (30, [(600, 620)]), # Back
+        (30, [])
+    ]
+    frames = []
+    for wait, clicks in steps:
+        frames += [{"events": []} for _ in range(wait)]
+        for pos in clicks:
+            frames.append({"events": [
+                encode(Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)),
+                encode(Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+            ]})
+    for i, frame in enumerate(frames):
+        frame["ticks"] = int((i + 1) * TOUR_FRAME)
+    return {"version": VERSION, "seed": 0, "ticks": 0, "frames": frames}
+
+
+def replay(recording: dict, canvas: Surface) -> FrameTimes:
+    """
+    Plays a recording through the same loop as the game.
+
+    Arguments:
+        recording {dict} -- Recording as returned by load.
+        canvas {Surface} -- Display surface.
+
+    Returns:
+        FrameTimes -- Time of every frame by the screen that drew it.
+    """
+    times = FrameTimes()
+    random.seed(recording["seed"])
+    FrameClock.install()
+    FrameClock.ticks = recording["ticks"]
+    try:
+        screen = ScreenManager.get(Settings(), MainMenu)
+        AssetLoader.finish()
+        for frame in recording["frames"]:
+            FrameClock.ticks = frame["ticks"]
+            start = time.perf_counter()
+            for event in [decode(e) for e in frame["events"]]:
+                if event.type == pygame.QUIT:
+                    return times
+                if event.type == pygame.VIDEOEXPOSE:
+                    screen.invalidate()
+                elif event.type != pygame.KEYDOWN or event.key != PerformanceHud.KEY:
+                    screen.handle(event)
+            AssetLoader.pump()
+            screen.update()
+            rects = screen.draw(canvas)
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+            times.add(label(screen), time.perf_counter() - start)
+            previous, screen = screen, screen.next()
+            if screen is not previous:
+                screen.invalidate()
+    except SystemExit:
+        # The recording ended with the Quit button
+        pass
+    finally:
+        FrameClock.uninstall()
+    return times
+
+
+def label(screen: Screen) -> str:
+    """
+    Returns:
+        str -- Name of the screen and its mode, if any.
+    """
+    return type(screen).__name__ + ("/" + screen.mode if screen.mode else "")
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a Let it Ride session headless and time its frames.")
+    parser.add_argument("recording", nargs="?", help="recording made with main.py --record (default: built in tour)")
+    parser.add_argument("--json", help="write the frame timings as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    canvas = pygame.display.set_mode(SIZE)
+    times = replay(load(args.recording) if args.recording else tour(), canvas)
+    print(times)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(times.report(), f, indent=2, sort_keys=True)
@@ -6,9 +6,17 @@ import pygame
 import string
 import math
 import sys
+import os
+import time
+import threading
+import queue
+import json
+import hashlib
+import struct
 from core import *
 from enum import Enum
-from typing import Tuple
+from typing import Tuple, List, Dict
+from collections import OrderedDict, deque
 
 """
 Some color definitions to keep things consistent
@@ -55,19 +63,63 @@ class Screen(ABC):
     def next(self):
         return self
 
+    """
+    Called when the screen takes over the display so its next frame is drawn in full
+    """
+    def invalidate(self):
+        pass
+
+    """
+    Called when the screen manager shows a kept screen again, so it starts
+    out as the current screen
+    """
+    def enter(self):
+        self._next_screen = self
+
+    """
+    True while the screen needs frames without any input, such as during
+    card animations. The game loop sleeps until the next event otherwise
+    """
+    @property
+    def animating(self) -> bool:
+        return False
+
+    """
+    Lines the screen adds to the performance HUD
+    """
+    @property
+    def metrics(self) -> List[str]:
+        return []
+
+    """
+    State the screen is in, frame timings are reported separately for each
+    """
+    @property
+    def mode(self) -> str:
+        return ""
+
 """
 The main gameplay screen
 """
 class GameScreen(Screen):
+    TURBO_ROUNDS = 200 # Most rounds played per frame in turbo mode
+    TURBO_FRAME_TIME = 0.03 # Seconds of game logic allowed per frame in turbo mode
+    TURBO_REFRESH = 0.25 # Seconds between turbo summary refreshes
+
     def __init__(self, settings: Settings):
         CardObject.CARD_BACK = settings.card
+        self._settings = settings
         self._action = Button(290, 500, width=148, height=50, text="Make $0 Bet", color=Colors.light_gray, down_color=Colors.gray,
             action=(self.action))
         
         self._pull = Button(480, 500, width=148, height=50, text="Reset Bet", color=Colors.light_gray, down_color=Colors.gray,
             action=self.clear)
-        self._winning = None
-        self._winning_side = None
+        self._winning = Button(250, 25, width=228, height=50, text=None, color=Colors.white, 
+            down_color=Colors.white, padding=5, border_color=Colors.black)
+        self._winning_side = Button(250, 80, width=228, height=50, text=None, color=Colors.white, 
+            down_color=Colors.white, padding=5, border_color=Colors.black)
+        self._winning.visible = False
+        self._winning_side.visible = False
         self._autoplay_button = Button(1020, 480, width=160, height=40, text="Autoplay On", color=Colors.gray, down_color=Colors.dark_blue_gray,
             action=(self.autoplay))
         self._card_selector_button = Button(1020, 530, width=160, height=40, text="Card Selector", color=Colors.gray, down_color=Colors.dark_blue_gray,
@@ -81,10 +133,21 @@ class GameScreen(Screen):
         self._show_probability = False
         self._main_menu = Button(10, 10, width=100, height=50, text="Main Menu", color=Colors.light_gray, down_color=Colors.gray, 
             action=(lambda: self.home(settings)))
-        self._game = Game(settings.game_decks, settings.player_name, settings.player_bankroll)
-        self.game.deal()
+        self._turbo_button = Button(120, 10, width=100, height=50, text="Turbo On", color=Colors.light_gray, down_color=Colors.gray,
+            action=(self.turbo))
+        self._turbo = False
+        self._statistics_time = None
+        self._hand_times = deque(maxlen=20)
+        self._turbo_summary = TextArea(100, 120, [], width=400, background_color=None, color=Colors.white)
+        self._turbo_summary.visible = False
+        self._game = Game(settings.game_decks, settings.player_name, settings.player_bankroll,
+            shoe=settings.game_shoe, penetration=settings.shoe_penetration)
+        if (not settings.game_shoe):
+            # A shoe is only dealt from once a bet is made, so its penetration starts at zero
+            self.game.deal()
         self._cards = []
         self._background = TextureManager.load(settings.background)
+        self._background_path = settings.background
         self._stage = 0
         self._bankroll = Button(100, 500, height=50, width=148, text="Bankroll: ", color=Colors.white, down_color=Colors.white, padding=5, border_color=Colors.black)
         self._side = Button(690, 500, width=148, height=50, text="Main Bet", color=Colors.light_gray, down_color=Colors.gray,
@@ -100,9 +163,13 @@ class GameScreen(Screen):
         sidePayouts.reverse()
         payoffSideTexts = ["Sidebet Payouts", "---------------"] + sidePayouts
         self._payoffs_side = TextArea(1000, 275, width=200, texts=payoffSideTexts, background_color=Colors.light_gray)
-        self._statistics = None
+        self._statistics = TextArea(664, 585, [], width=200, background_color=None, color=Colors.white)
+        self._statistics.visible = False
+        self._probability = TextArea(350, 120, [], background_color=Colors.white, width=500, centered=False, font_name="Courier")
         self._autoplay = False
         self._next_screen = self
+        self._renderer = DirtyRenderer()
+        self._dispatcher = EventDispatcher()
 
         self._bet_pool = 0
         self._side_bet = 0
@@ -154,8 +221,7 @@ class GameScreen(Screen):
             if (self._bet_pool <= 0):
                 return
             if (self._bet_pool*3 + int(self._side_bet_label.text[len("side: "):]) > self._game.player.money):
-                self._winning = Button(250, 25, width=228, height=50, text="Can't make bet, not enough money", color=Colors.white, 
-                    down_color=Colors.white, padding=5, border_color=Colors.black)
+                self.show_message(self._winning, "Can't make bet, not enough money")
                 return
         
             self._game.deal()
@@ -171,23 +237,21 @@ class GameScreen(Screen):
 
             [self._cards[i].flip() for i in range(3)]
             
-            self._winning_side=None
+            self._winning_side.visible = False
             if (self._side_bet > 0):       
                 self.game.player.side_bet(int(self._side_bet_label.text[len("side: "):]))
                 self._game.player.payout_side()
                 payout_side = self._game.player.hand.payout_side(int(self._side_bet_label.text[len("side: "):]))
                 winText_side = "Side bet: " + str(self.game.player.hand.type_side) + " - Win $" + str(payout_side)
-                
-                self._winning_side = Button(250, 80, width=228, height=50, text=winText_side, color=Colors.white, 
-                    down_color=Colors.white, padding=5, border_color=Colors.black)
+                self.show_message(self._winning_side, winText_side)
             
                 
             
             self._stage = 1
-            self._pull = Button(480, 500, width=148, height=50, text="Pull Bet 1", color=Colors.light_gray, down_color=Colors.gray,
-            action=(lambda: self.action(True)))
+            self._pull.text = "Pull Bet 1"
+            self._pull.action = self.pull
             self._action.text = "Let it ride"
-            self._winning = None
+            self._winning.visible = False
             if (self._show_statistics):
                 self.update_statistics()
         elif (self._stage == 1):
@@ -196,8 +260,7 @@ class GameScreen(Screen):
             if (pull):
                 self._game.player.pull()
                 self._bets[2].text = ""
-            self._pull = Button(480, 500, width=148, height=50, text="Pull Bet 2", color=Colors.light_gray, down_color=Colors.gray,
-                action=(lambda: self.action(True)))
+            self._pull.text = "Pull Bet 2"
             if (self._show_statistics):
                 self.update_statistics()
         elif (self._stage == 2):
@@ -208,20 +271,31 @@ class GameScreen(Screen):
             self._cards[4].flip()
             if (self._show_statistics):
                 self.update_statistics()
-            self._pull = Button(480, 500, width=148, height=50, text="Clear Bet", color=Colors.light_gray, down_color=Colors.gray,
-                action=(lambda: self.clear()))
+            self._pull.text = "Clear Bet"
+            self._pull.action = self.clear
             self._game.player.payout()
+            self._hand_times.append(time.perf_counter())
             payout = self._game.player.hand.payout(self._game.player.full_bet)
             winText = "Main bet: " + str(self.game.player.hand.type) + " - Win $" + str(payout)
-            self._winning = Button(250, 25, width=228, height=50, text=winText, color=Colors.white, 
-                    down_color=Colors.white, padding=5, border_color=Colors.black)
+            self.show_message(self._winning, winText)
             self._action.text = "Repeat Bet"
             if (self._bet_pool < 0):
                 return
 
+    def pull(self):
+        self.action(True)
+
+    """
+    Shows a message in one of the result boxes
+    """
+    def show_message(self, box: 'Button', text: str):
+        box.text = text
+        box.visible = True
+
     def home(self, settings):
         settings.player_bankroll = self._game.player.money
-        self._next_screen = MainMenu(settings)
+        ScreenManager.sync(settings)
+        self._next_screen = ScreenManager.get(settings, MainMenu)
 
     def autoplay(self):
         if (self._autoplay):
@@ -231,6 +305,57 @@ class GameScreen(Screen):
             self._autoplay = True
             self._autoplay_button.text = "Autoplay Off"
 
+    def turbo(self):
+        if (self._turbo):
+            self._turbo = False
+            self._turbo_button.text = "Turbo On"
+            self.update_turbo_summary()
+            return
+        if (self._stage != 0 or self._bet_pool <= 0):
+            self.show_message(self._winning, "Place a bet to start turbo")
+            return
+        if (self._autoplay):
+            self.autoplay()
+        self._turbo = True
+        self._turbo_button.text = "Turbo Off"
+        self._cards = []
+        self._winning.visible = False
+        self._winning_side.visible = False
+        self._turbo_hands = 0
+        self._turbo_net = 0
+        self._turbo_tally = dict()
+        self._turbo_start = time.time()
+        self.update_turbo_summary()
+
+    def play_turbo(self):
+        start = time.time()
+        player = self.game.player
+        for _ in range(GameScreen.TURBO_ROUNDS):
+            if (player.money < self._bet_pool * 3 + self._side_bet):
+                self.turbo()
+                self.show_message(self._winning, "Turbo stopped, not enough money")
+                return
+            self._turbo_net += self.game.play(self._bet_pool, self._side_bet)
+            self._turbo_hands += 1
+            hand_type = str(player.hand.type)
+            self._turbo_tally[hand_type] = self._turbo_tally.get(hand_type, 0) + 1
+            if (time.time() - start >= GameScreen.TURBO_FRAME_TIME):
+                break
+        if (time.time() - self._turbo_refreshed >= GameScreen.TURBO_REFRESH):
+            self.update_turbo_summary()
+
+    def update_turbo_summary(self):
+        self._turbo_refreshed = time.time()
+        elapsed = max(self._turbo_refreshed - self._turbo_start, 0.001)
+        texts = [
+            "Hands played: " + str(self._turbo_hands),
+            "Net: " + ("%+d" % self._turbo_net),
+            "Hands/sec: " + ("%.0f" % (self._turbo_hands / elapsed))
+        ]
+        texts += [k + ": " + str(v) for k, v in sorted(self._turbo_tally.items(), key=lambda x: -x[1])]
+        self._turbo_summary.texts = texts
+        self._turbo_summary.visible = True
+
     def show_statistics(self):
         self._show_statistics = not self._show_statistics
         if (self._show_statistics):
@@ -238,7 +363,7 @@ class GameScreen(Screen):
             self.update_statistics()
         else:
             self._statistics_button.text = "Show Statistics"
-            self._statistics = None
+            self._statistics.visible = False
 
     def show_probability(self):
         self._show_probability = not self._show_probability
@@ -246,41 +371,50 @@ class GameScreen(Screen):
             self.update_statistics()
 
     def cardselector(self):
-        self._next_screen = CardSelectorScreen(self)
+        self._next_screen = ScreenManager.get(self._settings, CardSelectorScreen, lambda: CardSelectorScreen(self))
 
     def update_statistics(self):
+        if (self.game.player.hand == None):
+            return
+        start = time.perf_counter()
         if (self._stage == 1 or self._stage == 2):
             cards = self.game.player.hand.cards[0:self._stage + 2]
         else:
             cards = self.game.player.hand.cards
-        deck_count = self._game._deck_count if self._game._deck_count < 10 else math.inf
-        probabilities = Statistics.handDistribution(cards, deck_count)
+        deck_count = self._game._deck_count if self._game._deck_count < 100 else math.inf
+        if (self._game.shoe and deck_count != math.inf):
+            probabilities = Statistics.compositionDistribution(cards, self._game.unseen_composition(cards))
+        else:
+            probabilities = Statistics.handDistribution(cards, deck_count)
         self._probabilityWin = sum([v for k,v in probabilities.items() if k in Hand.payouts])/sum(probabilities.values())
         self._expectedValue = Statistics.expectedValue(cards, probabilities)
         self._shouldRide = Statistics.shouldRide(cards, self._expectedValue)
-        self._statistics = TextArea(664, 585, [
+        self._statistics_time = time.perf_counter() - start
+        self._statistics.texts = [
             "Should Ride: " + str(self._shouldRide),
             "Expected Value: " + ("%.3f" % self._expectedValue),
             "Probability Win: " + ("%.3f" % self._probabilityWin)
-        ], width=200, background_color=None,color=Colors.white)
+        ]
+        self._statistics.visible = True
         if (self._show_probability):
             count = sum(probabilities.values())
             nothings = sum([value for key, value in probabilities.items() if not (key in Hand.payouts)])
             texts = [("[" + str(key) + "]").ljust(18) + " # hands=" + str(value) + ", p=" + ("%.3f" % (value/count)) for key, value in probabilities.items() if key in Hand.payouts]
             texts.append(("[Nothing]").ljust(18) + " # hands=" + str(nothings) + ", p=" + ("%.3f" % (nothings/count)))
             if (deck_count == math.inf):
-                texts.insert(0, "# decks >= 10, simulating inf. deck")
-            self._probability = TextArea(350, 120, texts, background_color=Colors.white, width=500, centered=False, font_name="Courier")
+                texts.insert(0, "# decks >= 100, simulating inf. deck")
+            self._probability.texts = texts
 
     def clear(self):
-        if (self._stage == 0):
-            self._pull = Button(480, 500, width=148, height=50, text="Reset Bet", color=Colors.light_gray, down_color=Colors.gray,
-                action=self.clear)
+        if (self._stage == 0 and not self._turbo):
+            self._pull.text = "Reset Bet"
+            self._pull.action = self.clear
             self._action.text = "Make $0 Bet"
             self._cards = []
-            self._winning = None
-            self._winning_side = None
-            self._statistics = None
+            self._winning.visible = False
+            self._winning_side.visible = False
+            self._statistics.visible = False
+            self._turbo_summary.visible = False
             self._bet_pool = 0
             self._side_bet=0
             self._side_bet_label.text="Side: 0"
@@ -295,78 +429,123 @@ class GameScreen(Screen):
     def cards(self):
         return self._cards
 
+    @property
+    def animating(self) -> bool:
+        return (self._autoplay or self._turbo or 
+            len([card for card in self.cards if card._dealing or card._flipping]) > 0)
+
+    @property
+    def metrics(self) -> List[str]:
+        metrics = []
+        if (self._statistics_time != None):
+            metrics.append("Statistics  %.2f ms" % (self._statistics_time * 1000))
+        if (self._turbo):
+            elapsed = max(time.time() - self._turbo_start, 0.001)
+            metrics.append("Hands/s     %.0f" % (self._turbo_hands / elapsed))
+        elif (self._autoplay and len(self._hand_times) > 1):
+            elapsed = max(self._hand_times[-1] - self._hand_times[0], 0.001)
+            metrics.append("Hands/s     %.1f" % ((len(self._hand_times) - 1) / elapsed))
+        return metrics
+
+    @property
+    def mode(self) -> str:
+        if (self._show_probability):
+            return "probability"
+        if (self._turbo):
+            return "turbo"
+        if (self._autoplay):
+            return "autoplay"
+        return ""
+
     def handle(self, event: Event):
+        self._dispatcher.dispatch(event, self.widgets())
+
+    """
+    Returns the widgets that take input in the current state, bottom to top
+    """
+    def widgets(self) -> List['GameObject']:
         if (self._show_probability):
-            self._probability_exit.handle(event)
-            return
-        self._action.handle(event)
-        self._autoplay_button.handle(event)
-        self._statistics_button.handle(event)
-        self._probability_distribution.handle(event)
-        self._side.handle(event)
+            return [self._probability_exit]
+        if (self._turbo):
+            return [self._turbo_button, self._main_menu]
+        widgets = [self._turbo_button, self._action, self._autoplay_button, self._statistics_button,
+            self._probability_distribution, self._side]
         if (self._stage == 0):
-            self._card_selector_button.handle(event)
-            [chip.handle(event) for chip in self._bet_buttons]
-        self._main_menu.handle(event)
-        if (self._pull != None):
-            self._pull.handle(event)
+            widgets += [self._card_selector_button] + self._bet_buttons
+        widgets += [self._main_menu, self._pull]
+        return widgets
 
     def update(self):
         self._bankroll.text = "Bankroll: " + str(self.game.player.money)
-        if (self._autoplay and len([card for card in self.cards if card._dealing or card._flipping]) == 0):
+        if (self._turbo):
+            self.play_turbo()
+        elif (self._autoplay and len([card for card in self.cards if card._dealing or card._flipping]) == 0):
             if (self._stage == 1 or self._stage == 2):
                 self.update_statistics()
                 self.action(not(self._shouldRide))
             else:
                 self.action()
 
-    def draw(self, canvas: Surface):
-        canvas.fill(Colors.white)
-        canvas.blit(self._background, (0,0))
-        pygame.draw.rect(canvas, Colors.light_gray, Rect(1000, 0, 200, 800))
-        pygame.draw.rect(canvas, Colors.gray, Rect(995, 0, 5, 800))
-        pygame.draw.rect(canvas, Colors.gray, Rect(1000, 265, 200, 5))
-        pygame.draw.rect(canvas, Colors.gray, Rect(1000, 470, 200, 5))
-        pygame.draw.rect(canvas, Colors.gray, Rect(0, 470, 995, 5))
+    def invalidate(self):
+        self._renderer.invalidate()
+
+    def draw_background(self, canvas: Surface):
+        canvas.blit(LayerCache.get(("game", self._background_path, canvas.get_size()), 
+            lambda: self._build_background(canvas)), (0, 0))
+
+    def _build_background(self, canvas: Surface) -> Surface:
+        layer = Surface(canvas.get_size(), 0, canvas)
+        layer.fill(Colors.white)
+        layer.blit(self._background, (0,0))
+        pygame.draw.rect(layer, Colors.light_gray, Rect(1000, 0, 200, 800))
+        pygame.draw.rect(layer, Colors.gray, Rect(995, 0, 5, 800))
+        pygame.draw.rect(layer, Colors.gray, Rect(1000, 265, 200, 5))
+        pygame.draw.rect(layer, Colors.gray, Rect(1000, 470, 200, 5))
+        pygame.draw.rect(layer, Colors.gray, Rect(0, 470, 995, 5))
         panel = pygame.Surface((995, 200))
         panel.set_alpha(80)
         panel.fill((0,0,0))
-        canvas.blit(panel, (0, 475))
-        self._action.draw(canvas)
-        self._bankroll.draw(canvas)
-        self._side.draw(canvas)
-        self._deck.draw(canvas)
-        self._payoffs.draw(canvas)
-        self._payoffs_side.draw(canvas)
-        self._autoplay_button.draw(canvas)
-        self._statistics_button.draw(canvas)
-        self._probability_distribution.draw(canvas)
-        self._main_menu.draw(canvas)
-        self._side_bet_label.draw(canvas)
+        layer.blit(panel, (0, 475))
+        return layer
+
+    def _build_overlay(self, canvas: Surface) -> Surface:
+        layer = Surface(canvas.get_size(), pygame.SRCALPHA, 32)
+        layer.fill((0, 0, 0, 80))
+        pygame.draw.rect(layer, Colors.white, (350, 90, 500, 300))
+        pygame.draw.rect(layer, Colors.black, (347, 87, 506, 306), 5)
+        return layer
+
+    """
+    Objects currently on the table, in drawing order
+    """
+    def objects(self) -> List['GameObject']:
+        objects = [
+            self._action, self._bankroll, self._side, self._deck, self._payoffs, self._payoffs_side,
+            self._autoplay_button, self._statistics_button, self._probability_distribution,
+            self._main_menu, self._turbo_button, self._side_bet_label
+        ]
         if (self._stage == 0):
-            self._card_selector_button.draw(canvas)
-        if (self._show_statistics) and (self._statistics):
-            self._statistics.draw(canvas)
-        if self._pull:
-            self._pull.draw(canvas)
-        if self._winning:
-            self._winning.draw(canvas)
-        if self._winning_side:
-            self._winning_side.draw(canvas)
-        [chip.draw(canvas) for chip in self._bet_buttons]
-        [card.draw(canvas) for card in self.cards]
-        [bet.draw(canvas) for bet in self._bet_labels]
-        [bet.draw(canvas) for bet in self._bets if bet.text]
-        self._x3_label.draw(canvas)
-        if self._show_probability:
-            s = pygame.Surface((canvas.get_width(), canvas.get_height()))
-            s.set_alpha(80)
-            s.fill(Colors.black)
-            canvas.blit(s, (0,0))
-            pygame.draw.rect(canvas, Colors.white, (350, 90, 500, 300))
-            pygame.draw.rect(canvas, Colors.black, (347, 87, 506, 306), 5)
-            self._probability.draw(canvas)
-            self._probability_exit.draw(canvas)
+            objects.append(self._card_selector_button)
+        if (self._show_statistics) and (self._statistics.visible):
+            objects.append(self._statistics)
+        objects += [item for item in (self._pull, self._winning, self._winning_side) if item.visible]
+        objects += self._bet_buttons + self.cards
+        if self._turbo_summary.visible and not self.cards:
+            objects.append(self._turbo_summary)
+        objects += self._bet_labels + [bet for bet in self._bets if bet.text]
+        objects.append(self._x3_label)
+        return objects
+
+    def draw(self, canvas: Surface):
+        if not self._show_probability:
+            return self._renderer.render(canvas, self.draw_background, self.objects())
+        # The overlay dims the whole table so it is always drawn in full
+        self._renderer.invalidate()
+        self.draw_background(canvas)
+        [item.draw(canvas) for item in self.objects()]
+        canvas.blit(LayerCache.get(("probability", canvas.get_size()), lambda: self._build_overlay(canvas)), (0, 0))
+        self._probability.draw(canvas)
+        self._probability_exit.draw(canvas)
 
     def next(self):
         return self._next_screen
@@ -382,15 +561,23 @@ class CardSelectorScreen(Screen):
         deck = Deck().cards
         deck.sort(key=(lambda x: (x.Suit.value, x.rank)))
         self._cards = [CardObject(5+91*(i%13),100+130*(i//13),card,scale=0.7,action=(lambda x: self.action(x))) for i, card in enumerate(deck)]
+        self._objects = {card.card.index: card for card in self._cards}
         self._selected = []
+        self._chosen = set()
+        self._borders = dict()
         self._next_screen = self
         self._game_screen = game
         self._background = game._background
+        self._background_path = game._background_path
+        self._renderer = DirtyRenderer()
+        self._dispatcher = EventDispatcher()
 
     def action(self, card):
-        if (card in self._selected):
-            self._selected.remove(card)
+        if (card.index in self._chosen):
+            self._chosen.remove(card.index)
+            self._selected = [selected for selected in self._selected if selected.index != card.index]
         elif (len(self._selected) < 5):
+            self._chosen.add(card.index)
             self._selected.append(card)
         if (len(self._selected) >= 5):
            self._title.text = "Click Save Cards"
@@ -403,35 +590,46 @@ class CardSelectorScreen(Screen):
 
     def back(self):
         if len(self._selected) > 0:
-            self._game_deal = self._game_screen.game.deal
-            self._game_screen.game.deal = self.deal
+            self._game_screen.game.known_cards = self._selected
         self._game_screen._next_screen = self._game_screen
         self._next_screen = self._game_screen 
 
-    def deal(self):
-        self._game_screen.game.deal = self._game_deal
-        self._game_screen.game._deck = Deck(self._game_screen.game._deck_count) # We may want to change this logic.
-        self._game_screen.game._deck.shuffle()
-        [self._game_screen.game._deck._cards.remove(card) for card in self._selected]
-        self._game_screen.game.player.hand = Hand(self._selected + [self._game_screen.game.deck.draw() for _ in range(5-len(self._selected))])
-
+    def enter(self):
+        Screen.enter(self)
+        self._selected = []
+        self._chosen = set()
+        self._title.text = "Select Card 1"
+        self._back.text = "Back"
 
     def update(self):
         pass
 
     def handle(self, event):
-        self._back.handle(event)
-        [card.handle(event) for card in self._cards]
+        self._dispatcher.dispatch(event, [self._back] + self._cards)
+
+    def invalidate(self):
+        self._renderer.invalidate()
+
+    """
+    Draws the felt with every card already on it
+    """
+    def draw_background(self, canvas):
+        canvas.blit(LayerCache.get(("selector", self._background_path, canvas.get_size()),
+            lambda: self._build_grid(canvas)), (0, 0))
+
+    def _build_grid(self, canvas: Surface) -> Surface:
+        layer = LayerCache.felt(canvas, self._background)
+        DirtyRenderer.draw(layer, self._cards)
+        return layer
+
+    def border(self, card: 'CardObject') -> 'Border':
+        if card.card.index not in self._borders:
+            self._borders[card.card.index] = Border(card.x-1, card.y-1, card.width+2, card.height+2, Color(100, 200, 255, 2), 4)
+        return self._borders[card.card.index]
 
     def draw(self, canvas):
-        canvas.fill(Colors.white)
-        canvas.blit(self._background, (0,0))
-        for card in self._cards:
-            card.draw(canvas)
-            if card.card in self._selected:
-                pygame.draw.rect(canvas, Color(100, 200, 255, 2), Rect(card.x-1, card.y-1, card.width+2, card.height+2), 4)
-        self._title.draw(canvas)
-        self._back.draw(canvas)
+        selected = [self.border(self._objects[index]) for index in sorted(self._chosen)]
+        return self._renderer.render(canvas, self.draw_background, selected + [self._title, self._back])
 
     def next(self):
         return self._next_screen
@@ -441,13 +639,12 @@ The main menu's screen
 """
 class MainMenu(Screen):
 
-    LOADED = False
-
     def __init__(self, settings=Settings()):
         CardObject.CARD_BACK = settings.card
         self._next_screen = self
         self._settings = settings
         self._background = TextureManager.load(settings.background)
+        AssetLoader.start(TextureAtlas.PATHS + ["./assets/felt" + str(i) + ".png" for i in range(1, 6)])
         self._buttons = [
 		    Button(400, 250, "Play", Colors.light_gray, down_color=Colors.gray, width=400, height=80, action=self._to_game),
 		    Button(400, 340, "Info", Colors.light_gray, down_color=Colors.gray, width=400, height=80, action=self._to_info),
@@ -458,19 +655,17 @@ class MainMenu(Screen):
 		    Label(340, 70, "Let It Ride Poker", font_size = 80, font_name="IMPACT", color=Colors.white),
             Label(361, 650, "Created by Bailey D'Amour, Joseph Miller and Michael Cardy", color=Colors.white)
 		]
-        if not MainMenu.LOADED:
-            [TextureManager.load("./assets/card_back" + str(i) + ".png") for i in range(1,6)]
-            [TextureManager.load(card.filename) for card in Deck().cards]
-            MainMenu.LOADED=True
+        self._progress = Label(20, 650, "", color=Colors.white)
+        self._dispatcher = EventDispatcher()
 
     def _to_game(self):
-        self._next_screen = GameScreen(self._settings)
+        self._next_screen = LoadingScreen.before(self._settings, lambda: ScreenManager.get(self._settings, GameScreen))
 		
     def _to_settings(self):
-        self._next_screen = SettingsScreen(self._settings)
+        self._next_screen = LoadingScreen.before(self._settings, lambda: ScreenManager.get(self._settings, SettingsScreen))
     
     def _to_info(self):
-        self._next_screen = InfoScreen(self._settings)
+        self._next_screen = ScreenManager.get(self._settings, InfoScreen)
 
     @property
     def buttons(self):
@@ -480,28 +675,93 @@ class MainMenu(Screen):
         return self._labels
 
     def handle(self, event: Event):
-        for button in self.buttons:
-            button.handle(event)
+        self._dispatcher.dispatch(event, self.buttons)
 
     def update(self):
-        pass
+        self._progress.text = ("Loading assets " + str(int(AssetLoader.progress() * 100)) + "%") if AssetLoader.loading() else ""
 
     def draw(self, canvas: Surface):
-        canvas.fill(Colors.white)
-        canvas.blit(self._background, (0,0))
+        canvas.blit(LayerCache.get(("menu", self._settings.background, CardObject.CARD_BACK, canvas.get_size()),
+            lambda: self._build_background(canvas)), (0, 0))
+        [item.draw(canvas) for item in self.buttons + self.labels + [self._progress]]
+
+    def _build_background(self, canvas: Surface) -> Surface:
+        layer = LayerCache.felt(canvas, self._background)
         card_back = TextureManager.load(CardObject.CARD_BACK)
-        canvas.blit(pygame.transform.rotate(card_back, 20), (720, 28))
-        canvas.blit(card_back, (800, 45))
-        canvas.blit(pygame.transform.rotate(card_back, -20), (820, 45))
+        layer.blit(pygame.transform.rotate(card_back, 20), (720, 28))
+        layer.blit(card_back, (800, 45))
+        layer.blit(pygame.transform.rotate(card_back, -20), (820, 45))
         back = Surface((540, 100))
         back.set_alpha(120)
         back.fill(Colors.black)
-        canvas.blit(back, (330, 70))
-        [item.draw(canvas) for item in self.buttons + self.labels]
+        layer.blit(back, (330, 70))
+        return layer
     
     def next(self):
         return self._next_screen
 
+"""
+The loading screen shows the progress of the asset preload and builds the
+next screen once every asset is ready
+"""
+class LoadingScreen(Screen):
+    BAR = Rect(300, 400, 600, 30)
+
+    def __init__(self, settings: Settings, build):
+        self._next_screen = self
+        self._build = build
+        self._background = TextureManager.load(settings.background)
+        self._background_path = settings.background
+        self._label = Label(500, 300, "Loading...", font_size=64, font_name="Impact", color=Colors.white)
+        self._error = Label(300, 450, "", color=Colors.white)
+
+    """
+    Returns the screen to show for a screen that needs every asset, which
+    is a loading screen only while the preload is still running
+
+    Arguments:
+        settings {Settings} -- Current settings.
+        build {Callable[[], Screen]} -- Builds the screen once assets are ready.
+
+    Returns:
+        Screen -- The loading screen, or the built screen.
+    """
+    @staticmethod
+    def before(settings: Settings, build) -> Screen:
+        if (AssetLoader.loading()):
+            return LoadingScreen(settings, build)
+        return build()
+
+    @property
+    def animating(self) -> bool:
+        return not self._error.text
+
+    def handle(self, event: Event):
+        pass
+
+    def update(self):
+        if (AssetLoader.loading() or self._error.text):
+            return
+        try:
+            self._next_screen = self._build()
+        except (pygame.error, OSError):
+            # Stay on the loading screen with the missing textures instead of crashing
+            self._error.text = "Could not load " + ", ".join(AssetLoader.failed or ["the textures"])
+
+    def draw(self, canvas: Surface):
+        canvas.blit(LayerCache.get(("felt", self._background_path, canvas.get_size()),
+            lambda: LayerCache.felt(canvas, self._background)), (0, 0))
+        self._label.draw(canvas)
+        bar = Rect(self.BAR)
+        pygame.draw.rect(canvas, Colors.black, bar)
+        bar.width = int(bar.width * AssetLoader.progress())
+        pygame.draw.rect(canvas, Colors.light_gray, bar)
+        pygame.draw.rect(canvas, Colors.white, self.BAR, 2)
+        self._error.draw(canvas)
+
+    def next(self):
+        return self._next_screen
+
 """
 The info screen gives game rules and misc. information regarding the program
 """
@@ -509,7 +769,9 @@ class InfoScreen(Screen):
 
     def __init__(self, settings: Settings):
         self._next_screen = self
+        self._dispatcher = EventDispatcher()
         self._background = TextureManager.load(settings.background)
+        self._background_path = settings.background
         self._buttons = [Button(10, 10, width=100, height=50, text="Back", color=Colors.light_gray, down_color=Colors.gray, 
             action=(lambda: self.home(settings)))]
         self._labels = [
@@ -545,11 +807,10 @@ class InfoScreen(Screen):
         ]
 
     def handle(self, event: Event):
-        for button in self.buttons:
-            button.handle(event)
+        self._dispatcher.dispatch(event, self.buttons)
 
     def home(self, settings):
-        self._next_screen = MainMenu(settings)
+        self._next_screen = ScreenManager.get(settings, MainMenu)
 
     @property
     def buttons(self):
@@ -563,8 +824,8 @@ class InfoScreen(Screen):
         pass
 
     def draw(self, canvas: Surface):
-        canvas.fill(Colors.white)
-        canvas.blit(self._background, (0,0))
+        canvas.blit(LayerCache.get(("felt", self._background_path, canvas.get_size()),
+            lambda: LayerCache.felt(canvas, self._background)), (0, 0))
         [item.draw(canvas) for item in self.buttons + self.labels]
     
     def next(self):
@@ -577,6 +838,7 @@ class SettingsScreen(Screen):
 
     def __init__(self, settings: Settings=Settings()):
         CardObject.CARD_BACK = settings.card
+        self._settings = settings
         self._player_name = TextBox(350, 150, 600, 40, text=settings.player_name, placeholder_text="Name...", font_size=30)
         self._player_money = TextBox(350, 150, 600, 40, text=str(settings.player_bankroll), placeholder_text="Money...", font_size=30)
         self._game_decks = TextBox(350, 210, 600, 40, text=str(settings.game_decks), placeholder_text="Decks...", font_size=30)
@@ -584,9 +846,15 @@ class SettingsScreen(Screen):
         self._backgrounds = []
         for i in range(0,5):
             background = "./assets/felt" + str(i+1) + ".png"
-            sprite = SpriteObject(400 + i*100, 280, background, scale=0.08, action=(lambda s: self.set_background(s.background)))
+            sprite = SpriteObject(400 + i*100, 280, background, scale=0.08, action=(lambda s: self.set_background(s.background)),
+                smooth=True)
             sprite.background = background
             self._backgrounds.append(sprite)
+        self._game_shoe = settings.game_shoe
+        self._shoe = Button(350, 535, width=100, height=40, color=Colors.white, text="On" if settings.game_shoe else "Off",
+            action=self.toggle_shoe)
+        self._shoe_penetration = TextBox(600, 535, 100, 40, text=str(int(round(settings.shoe_penetration * 100))),
+            placeholder_text="%...", font_size=30)
         self._cards = []
         for i in range(0,5):
             card = "./assets/card_back" + str(i+1) + ".png"
@@ -601,11 +869,23 @@ class SettingsScreen(Screen):
             self._game_decks,
             Button(480, 600, width=240, color=Colors.white, text="Back", action=(lambda: self.gather_settings())),
             Label(200, 280, "Background: ", font_size=36),
-            Label(200, 380, "Card Back:", font_size=36)
+            Label(200, 380, "Card Back:", font_size=36),
+            Label(200, 535, "Shoe: ", font_size=36),
+            self._shoe,
+            Label(470, 535, "Cut at %: ", font_size=36),
+            self._shoe_penetration
         ] + self._backgrounds + self._cards
         self.set_background(settings.background)
         self._card = settings.card
         self._next_screen = self
+        self._dispatcher = EventDispatcher()
+
+    """
+    Shows the bankroll the game has reached since the screen was built
+    """
+    def enter(self):
+        Screen.enter(self)
+        self._player_money.text = str(self._settings.player_bankroll)
 
     def set_background(self, background):
         self._selected_background = background
@@ -614,12 +894,22 @@ class SettingsScreen(Screen):
     def set_card(self, card):
         self._card = card
 
+    def _build_background(self, canvas: Surface) -> Surface:
+        layer = LayerCache.felt(canvas, self._background)
+        pygame.draw.rect(layer, Color(180, 180, 180, 0), Rect(150, 0, 900, 675))
+        return layer
+
+    def toggle_shoe(self):
+        self._game_shoe = not self._game_shoe
+        self._shoe.text = "On" if self._game_shoe else "Off"
+
     def gather_settings(self):
         if (self._warning.text == None):
-            self._next_screen = MainMenu(Settings(self._player_name.text, int(self._player_money.text), int(self._game_decks.text), self._selected_background, self._card))
+            self._next_screen = ScreenManager.get(Settings(self._player_name.text, int(self._player_money.text), int(self._game_decks.text), 
+                self._selected_background, self._card, self._game_shoe, int(self._shoe_penetration.text) / 100), MainMenu)
 
     def handle(self, event: Event):
-        [component.handle(event) for component in self._components]
+        self._dispatcher.dispatch(event, self._components)
 
     def update(self):
         if (not self._player_money.text.isdigit()):
@@ -628,13 +918,14 @@ class SettingsScreen(Screen):
             self._warning.text = "Game decks must be a number"
         elif (int(self._game_decks.text) <= 0):
             self._warning.text = "Game deck must be larger than 0"
+        elif (not self._shoe_penetration.text.isdigit() or not 0 < int(self._shoe_penetration.text) <= 100):
+            self._warning.text = "Cut card must be between 1 and 100%"
         else:
             self._warning.text = None
 
     def draw(self, canvas: Surface):
-        canvas.fill(Colors.white)
-        canvas.blit(self._background, (0,0))
-        pygame.draw.rect(canvas, Color(180, 180, 180, 0), Rect(150, 0, 900, 675))
+        canvas.blit(LayerCache.get(("settings", self._selected_background, canvas.get_size()),
+            lambda: self._build_background(canvas)), (0, 0))
         [component.draw(canvas) for component in self._components]
         for cardSprite in self._cards:
             if (cardSprite.card == self._card):
@@ -649,33 +940,785 @@ class SettingsScreen(Screen):
         return self._next_screen
 
 """
-Texture manager caches textures to avoid reloading of textures
+Screen manager keeps one instance of each screen type and shows it again on
+later visits instead of rebuilding it. Every kept screen is dropped once the
+settings they were built from change
+"""
+class ScreenManager:
+    screens = dict()
+    key = None
+
+    """
+    Returns the kept screen of a type, building it if needed
+
+    Arguments:
+        settings {Settings} -- Current settings.
+        screen {type} -- Type of the screen.
+
+    Keyword Arguments:
+        build {Callable[[], Screen]} -- Builds the screen, by default
+            screen(settings). (default: {None})
+
+    Returns:
+        Screen -- The screen, ready to take over.
+    """
+    @staticmethod
+    def get(settings: Settings, screen: type, build=None) -> Screen:
+        if (ScreenManager._key(settings) != ScreenManager.key):
+            ScreenManager.screens.clear()
+            ScreenManager.key = ScreenManager._key(settings)
+        if (screen not in ScreenManager.screens):
+            ScreenManager.screens[screen] = build() if build != None else screen(settings)
+        else:
+            ScreenManager.screens[screen].enter()
+        return ScreenManager.screens[screen]
+
+    """
+    Accepts changes made by the game itself, such as the bankroll, without
+    dropping the kept screens
+    """
+    @staticmethod
+    def sync(settings: Settings):
+        ScreenManager.key = ScreenManager._key(settings)
+
+    @staticmethod
+    def _key(settings: Settings) -> tuple:
+        return (settings.player_name, settings.player_bankroll, settings.game_decks, settings.background,
+            settings.card, settings.game_shoe, settings.shoe_penetration)
+
+"""
+Performance HUD shows frame timings and cache statistics over any screen.
+The game loop reports how long each phase of a frame took. What the HUD
+covers is put back before the screen draws, so dirty rendering still sees
+the canvas as the screen left it. The HUD renders its own text so it does
+not churn the text cache it reports on
+"""
+class PerformanceHud:
+    KEY = pygame.K_F3
+    WINDOW = 120 # Frames the averages and percentiles are taken over
+    REFRESH = 0.25 # Seconds between text refreshes
+
+    def __init__(self):
+        self._visible = False
+        self._frames = deque(maxlen=PerformanceHud.WINDOW)
+        self._font = FontManager.load("Courier", 16)
+        self._surface = None
+        self._refreshed = 0
+        self._under = None
+        self._covered = None
+
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    """
+    Toggles the HUD on its key
+
+    Returns:
+        bool -- True if the event was used by the HUD.
+    """
+    def handle(self, event: Event) -> bool:
+        if (event.type == pygame.KEYDOWN and event.key == PerformanceHud.KEY):
+            self._visible = not self._visible
+            self._refreshed = 0
+            return True
+        return False
+
+    """
+    Records the seconds spent in each phase of a frame
+    """
+    def record(self, handle: float, update: float, draw: float):
+        self._frames.append((handle, update, draw))
+
+    """
+    Puts back what the HUD covered, called before the screen draws
+    """
+    def restore(self, canvas: Surface):
+        if (self._under != None):
+            canvas.blit(self._under, self._covered)
+            self._under = None
+
+    """
+    Draws the HUD over the screen
+
+    Arguments:
+        canvas {Surface} -- Canvas the screen drew on.
+        screen {Screen} -- Current screen.
+        fps {float} -- Frame rate measured by the game loop.
+
+    Returns:
+        List[Rect] -- Regions of the canvas the HUD changed.
+    """
+    def draw(self, canvas: Surface, screen: Screen, fps: float) -> List[Rect]:
+        rects = [self._covered] if self._covered else []
+        self._covered = None
+        if (not self._visible):
+            return rects
+        if (time.perf_counter() - self._refreshed >= PerformanceHud.REFRESH):
+            self._refreshed = time.perf_counter()
+            self._surface = self._render(self.lines(screen, fps))
+        self._covered = self._surface.get_rect(topright=(canvas.get_width() - 10, 10)).clip(canvas.get_rect())
+        self._under = canvas.subsurface(self._covered).copy()
+        canvas.blit(self._surface, self._covered)
+        return rects + [self._covered]
+
+    def _render(self, lines: List[str]) -> Surface:
+        texts = [self._font.render(line, False, Colors.white) for line in lines]
+        surface = Surface((max(text.get_width() for text in texts) + 8, sum(text.get_height() for text in texts) + 8))
+        surface.fill(Colors.black)
+        y = 4
+        for text in texts:
+            surface.blit(text, (4, y))
+            y += text.get_height()
+        return surface
+
+    """
+    Returns:
+        List[str] -- Text of the HUD.
+    """
+    def lines(self, screen: Screen, fps: float) -> List[str]:
+        # Frame ms is the work of a frame, without the wait for the frame cap
+        lines = ["FPS         %.1f" % fps]
+        if (self._frames):
+            totals = sorted(sum(frame) for frame in self._frames)
+            percentile = lambda p: totals[min(len(totals) - 1, int(p * len(totals)))] * 1000
+            lines.append("Frame ms    p50 %.2f p95 %.2f p99 %.2f" % (percentile(0.5), percentile(0.95), percentile(0.99)))
+            averages = [sum(phase) / len(self._frames) * 1000 for phase in zip(*self._frames)]
+            lines.append("Handle ms   %.3f" % averages[0])
+            lines.append("Update ms   %.3f" % averages[1])
+            lines.append("Draw ms     %.3f" % averages[2])
+        lines += screen.metrics
+        lines.append("Text cache  %d/%d hit %s" % (len(TextCache.surfaces), TextCache.SIZE,
+            PerformanceHud._rate(TextCache.hits, TextCache.misses)))
+        lines.append("Textures    %d + %d scaled hit %s" % (len(TextureManager.textures), len(TextureManager.scaled_textures),
+            PerformanceHud._rate(TextureManager.hits, TextureManager.misses)))
+        lines.append("Scaled      %.1f/%.0f MB" % (TextureManager.scaled_bytes / 2**20, TextureManager.BUDGET / 2**20))
+        lines.append("Layers      %d  EV memo %d" % (len(LayerCache.layers), len(Statistics._evCache)))
+        return lines
+
+    @staticmethod
+    def _rate(hits: int, misses: int) -> str:
+        return "%.0f%%" % (100 * hits / (hits + misses)) if hits + misses else "-"
+
+"""
+Event dispatcher hands each event to the widget it is meant for instead of
+to every widget. Pointer events go to the topmost widget under event.pos,
+looked up in a grid of widget rects that is rebuilt only when the widgets
+or their layout change. The pressed widget also gets the release, and the
+focused widget, the one pressed last, gets key events and the next press
+so it can let go of focus
+"""
+class EventDispatcher:
+    CELL = 64
+    TYPES = [pygame.QUIT, pygame.KEYDOWN, pygame.TEXTINPUT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.VIDEOEXPOSE]
+
+    def __init__(self):
+        self._widgets = None
+        self._moves = None
+        self._grid = dict()
+        self._pressed = None
+        self._focus = None
+
+    """
+    Keeps event types no screen handles, such as mouse motion, out of the queue
+    """
+    @staticmethod
+    def filter():
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(EventDispatcher.TYPES)
+
+    """
+    Arguments:
+        event {Event} -- Event to dispatch.
+        widgets {List[GameObject]} -- Widgets taking input, bottom to top.
+    """
+    def dispatch(self, event: Event, widgets: List['GameObject']):
+        if (widgets != self._widgets or GameObject.moves != self._moves):
+            self._index(widgets)
+        if (event.type == pygame.KEYDOWN):
+            targets = [self._focus]
+        elif (hasattr(event, "pos")):
+            target = self.find(event.pos)
+            targets = [target]
+            if (event.type == pygame.MOUSEBUTTONDOWN):
+                targets.insert(0, self._focus)
+                self._pressed = self._focus = target
+            elif (event.type == pygame.MOUSEBUTTONUP):
+                targets.append(self._pressed)
+                self._pressed = None
+        else:
+            return
+        handled = []
+        for widget in targets:
+            if (widget != None and widget not in handled):
+                handled.append(widget)
+                widget.handle(event)
+
+    """
+    Returns:
+        GameObject -- Topmost widget at a position, None if there is none.
+    """
+    def find(self, pos: Tuple[int, int]) -> 'GameObject':
+        for widget, rect in reversed(self._grid.get((int(pos[0]) // self.CELL, int(pos[1]) // self.CELL), [])):
+            if (rect.collidepoint(pos)):
+                return widget
+        return None
+
+    def _index(self, widgets: List['GameObject']):
+        self._widgets = list(widgets)
+        self._moves = GameObject.moves
+        self._grid = dict()
+        for widget in widgets:
+            if (type(widget).handle is GameObject.handle or not widget.visible):
+                continue
+            rect = widget.rect
+            for x in range(rect.left // self.CELL, (rect.right - 1) // self.CELL + 1):
+                for y in range(rect.top // self.CELL, (rect.bottom - 1) // self.CELL + 1):
+                    self._grid.setdefault((x, y), []).append((widget, rect))
+
+"""
+Dirty renderer redraws only the parts of a screen that changed since the
+last frame. Objects are given in drawing order over a background drawing function
+"""
+class DirtyRenderer:
+    def __init__(self):
+        self._full = True
+        self._objects = []
+
+    """
+    Forces the next frame to be drawn in full
+    """
+    def invalidate(self):
+        self._full = True
+
+    """
+    Draws a frame and returns the regions of the canvas that changed
+    """
+    def render(self, canvas: Surface, background, objects: List['GameObject']) -> List[Rect]:
+        GameObject.now = pygame.time.get_ticks()
+        if self._full:
+            self._full = False
+            canvas.set_clip(None)
+            background(canvas)
+            DirtyRenderer.draw(canvas, objects)
+            rects = [canvas.get_rect()]
+        else:
+            current = set(id(item) for item in objects)
+            previous = set(id(item) for item in self._objects)
+            rects = [item._drawn for item in self._objects if id(item) not in current and item._drawn]
+            for item in objects:
+                if id(item) not in previous:
+                    rects.append(item.bounds)
+                elif item.dirty:
+                    rects += item.dirty_rects()
+            rects = DirtyRenderer._merge(rects, canvas.get_rect())
+            for rect in rects:
+                canvas.set_clip(rect)
+                background(canvas)
+                DirtyRenderer.draw(canvas, [item for item in objects if item.bounds.colliderect(rect)])
+            canvas.set_clip(None)
+        [item.mark_drawn() for item in objects]
+        self._objects = list(objects)
+        return rects
+
+    """
+    Draws objects in order, sending runs of single image objects to the
+    canvas in one Surface.blits call
+    """
+    @staticmethod
+    def draw(canvas: Surface, objects: List['GameObject']):
+        batch = []
+        for item in objects:
+            blit = item.blit_args()
+            if (blit != None):
+                batch.append(blit)
+                continue
+            if batch:
+                canvas.blits(batch, False)
+                batch = []
+            item.draw(canvas)
+        if batch:
+            canvas.blits(batch, False)
+
+    @staticmethod
+    def _merge(rects: List[Rect], area: Rect) -> List[Rect]:
+        merged = []
+        for rect in rects:
+            rect = Rect(rect).clip(area)
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            i = 0
+            while i < len(merged):
+                if merged[i].colliderect(rect):
+                    rect.union_ip(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+        return merged
+
+"""
+Layer cache keeps pre-composited surfaces, such as the static background of
+a screen, so they are built once instead of on every frame. Each layer is a
+full canvas, so only the SIZE most recently used ones are kept, which covers
+every screen of the current settings
+"""
+class LayerCache:
+    SIZE = 8
+    layers = OrderedDict()
+
+    @staticmethod
+    def get(key, build) -> Surface:
+        layer = LayerCache.layers.get(key)
+        if (layer != None):
+            LayerCache.layers.move_to_end(key)
+            return layer
+        layer = build()
+        LayerCache.layers[key] = layer
+        if (len(LayerCache.layers) > LayerCache.SIZE):
+            LayerCache.layers.popitem(last=False)
+        return layer
+
+    """
+    Builds a canvas sized copy of a felt background
+    """
+    @staticmethod
+    def felt(canvas: Surface, background: Surface) -> Surface:
+        layer = Surface(canvas.get_size(), 0, canvas)
+        layer.fill(Colors.white)
+        layer.blit(background, (0,0))
+        return layer
+
+"""
+Font manager shares one Font per name, size and style so system fonts are
+only looked up once per process, keeping the SIZE most recently loaded
+"""
+class FontManager:
+    SIZE = 64
+    fonts = OrderedDict()
+
+    @staticmethod
+    def load(name: str, size: int, bold: bool=False, italic: bool=False) -> Font:
+        key = (name.lower(), size, bool(bold), bool(italic))
+        if (key in FontManager.fonts):
+            FontManager.fonts.move_to_end(key)
+            return FontManager.fonts[key]
+        font = pygame.font.SysFont(name, size, bold=bold, italic=italic)
+        FontManager.fonts[key] = font
+        if (len(FontManager.fonts) > FontManager.SIZE):
+            FontManager.fonts.popitem(last=False)
+        return font
+
+"""
+Text cache keeps rendered text surfaces so that unchanged text only costs a
+blit. The least recently used surfaces are dropped once SIZE is reached
+"""
+class TextCache:
+    SIZE = 512
+    surfaces = OrderedDict()
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def render(font: Font, text: str, color: Color) -> Surface:
+        key = (font, text or "", tuple(color))
+        surface = TextCache.surfaces.get(key)
+        if (surface != None):
+            TextCache.hits += 1
+            TextCache.surfaces.move_to_end(key)
+            return surface
+        TextCache.misses += 1
+        surface = font.render(text or "", False, color)
+        TextCache.surfaces[key] = surface
+        if (len(TextCache.surfaces) > TextCache.SIZE):
+            TextCache.surfaces.popitem(last=False)
+        return surface
+
+    """
+    Measures text without rendering it
+    """
+    @staticmethod
+    def size(font: Font, text: str) -> Tuple[int, int]:
+        return font.size(text or "")
+
+"""
+Disk cache keeps decoded pixels under DIRECTORY so that later runs read raw
+buffers in one go instead of decoding PNGs. An entry is rebuilt when the
+cache VERSION changes or one of its source files changed, judged by the
+modification time and size, then by a content hash when those differ
+"""
+class DiskCache:
+    VERSION = 1
+    DIRECTORY = "./.cache"
+    MAGIC = b"LIRC"
+
+    """
+    Returns a cached image, building and saving it on a miss
+
+    Arguments:
+        key {str} -- Name of the entry.
+        sources {List[str]} -- Files the image is built from.
+        build {Callable[[], Tuple[Surface, object]]} -- Builds the image and
+            any JSON serializable data kept with it.
+
+    Returns:
+        Tuple[Surface, object] -- Unconverted image and its data.
+    """
+    @staticmethod
+    def get(key: str, sources: List[str], build) -> Tuple[Surface, object]:
+        file = os.path.join(DiskCache.DIRECTORY, hashlib.sha1(key.encode()).hexdigest() + ".bin")
+        entry = DiskCache._read(file, sources)
+        if (entry != None):
+            return entry
+        img, data = build()
+        DiskCache._write(file, sources, img, data)
+        return img, data
+
+    """
+    Decodes an image file through the cache
+    """
+    @staticmethod
+    def image(path: str) -> Surface:
+        return DiskCache.get(path, [path], lambda: (pygame.image.load(path), None))[0]
+
+    @staticmethod
+    def _read(file: str, sources: List[str]) -> Tuple[Surface, object]:
+        stale = False
+        try:
+            with open(file, "rb") as f:
+                if (f.read(4) != DiskCache.MAGIC):
+                    return None
+                header = json.loads(f.read(struct.unpack(">I", f.read(4))[0]).decode())
+                if (header["version"] != DiskCache.VERSION or [source[0] for source in header["sources"]] != sources):
+                    return None
+                for path, mtime, size, digest in header["sources"]:
+                    stat = os.stat(path)
+                    if (stat.st_mtime_ns != mtime or stat.st_size != size):
+                        if (DiskCache._hash(path) != digest):
+                            return None
+                        stale = True
+                pixels = f.read()
+            width, height = header["size"]
+            if (len(pixels) != width * height * len(header["format"])):
+                return None
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+        img = pygame.image.fromstring(pixels, (width, height), header["format"])
+        if (stale):
+            # Records the new times so the sources are not hashed again
+            DiskCache._write(file, sources, img, header["data"])
+        return img, header["data"]
+
+    @staticmethod
+    def _write(file: str, sources: List[str], img: Surface, data):
+        form = "RGBA" if img.get_flags() & pygame.SRCALPHA else "RGB"
+        temp = file + "." + str(threading.get_ident())
+        try:
+            header = json.dumps({
+                "version": DiskCache.VERSION,
+                "size": img.get_size(),
+                "format": form,
+                "sources": [[path, os.stat(path).st_mtime_ns, os.stat(path).st_size, DiskCache._hash(path)] for path in sources],
+                "data": data
+            }).encode()
+            os.makedirs(DiskCache.DIRECTORY, exist_ok=True)
+            with open(temp, "wb") as f:
+                f.write(DiskCache.MAGIC + struct.pack(">I", len(header)) + header)
+                f.write(pygame.image.tostring(img, form))
+            os.replace(temp, file)
+        except OSError:
+            # An unwritable cache only costs the decode next time
+            pass
+
+    @staticmethod
+    def _hash(path: str) -> str:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+"""
+Texture manager caches textures to avoid reloading of textures. Scaled
+variants are cached per path and scale, dropping the least recently used
+ones once they take more than BUDGET bytes
 """
 class TextureManager:
+    BUDGET = 32 * 1024 * 1024
     textures = dict()
+    scaled_textures = OrderedDict()
+    scaled_bytes = 0
+    hits = 0
+    misses = 0
 
     @staticmethod
     def save(path, img):
         TextureManager.textures[path] = img
+        for key in [key for key in TextureManager.scaled_textures if key[0] == path]:
+            TextureManager._evict(key)
 
     @staticmethod
     def load(path: str) -> Surface:
         if (path in TextureManager.textures):
+            TextureManager.hits += 1
             return TextureManager.textures.get(path)
+        TextureManager.misses += 1
+        if (path in TextureAtlas.PATHS and (TextureAtlas.surface != None or not AssetLoader.loading())):
+            img = TextureAtlas.load(path)
         else:
-            img = pygame.image.load(path)
-            TextureManager.textures[path] = img
+            img = TextureManager.convert(DiskCache.image(path))
+        TextureManager.textures[path] = img
+        return img
+
+    """
+    Loads a texture scaled by a factor, scaling it only the first time
+
+    Arguments:
+        path {str} -- Path of the texture.
+        scale {float} -- Scale factor.
+
+    Keyword Arguments:
+        smooth {bool} -- Filter with smoothscale instead of scale. (default: {False})
+
+    Returns:
+        Surface -- Scaled texture, shared between callers.
+    """
+    @staticmethod
+    def scaled(path: str, scale: float, smooth: bool=False) -> Surface:
+        if (scale == 1):
+            return TextureManager.load(path)
+        key = (path, scale, smooth)
+        img = TextureManager.scaled_textures.get(key)
+        if (img != None):
+            TextureManager.hits += 1
+            TextureManager.scaled_textures.move_to_end(key)
+            return img
+        TextureManager.misses += 1
+        if (path in TextureAtlas.PATHS):
+            img = TextureManager._scale(TextureManager.load(path), scale, smooth)
+        else:
+            # Thumbnails of the large textures are kept on disk, so later runs skip the full image
+            img = TextureManager.convert(DiskCache.get(path + "@" + str(scale) + ("s" if smooth else ""), [path],
+                lambda: (TextureManager._scale(TextureManager.load(path), scale, smooth), None))[0])
+        TextureManager.scaled_textures[key] = img
+        TextureManager.scaled_bytes += TextureManager._bytes(img)
+        while (TextureManager.scaled_bytes > TextureManager.BUDGET and len(TextureManager.scaled_textures) > 1):
+            TextureManager._evict(next(iter(TextureManager.scaled_textures)))
+        return img
+
+    @staticmethod
+    def _scale(img: Surface, scale: float, smooth: bool) -> Surface:
+        size = (int(img.get_width() * scale), int(img.get_height() * scale))
+        if (smooth and img.get_bytesize() in (3, 4)):
+            return pygame.transform.smoothscale(img, size)
+        return pygame.transform.scale(img, size)
+
+    @staticmethod
+    def _evict(key):
+        TextureManager.scaled_bytes -= TextureManager._bytes(TextureManager.scaled_textures.pop(key))
+
+    @staticmethod
+    def _bytes(img: Surface) -> int:
+        return img.get_pitch() * img.get_height()
+
+    """
+    Converts an image to the display's pixel format so blits skip the conversion
+    """
+    @staticmethod
+    def convert(img: Surface) -> Surface:
+        if (pygame.display.get_surface() == None):
             return img
+        if (img.get_flags() & pygame.SRCALPHA):
+            return img.convert_alpha()
+        return img.convert()
+
+"""
+Texture atlas packs the card faces, card backs and chips into one converted
+surface. Each image is handed out as a subsurface of the atlas
+"""
+class TextureAtlas:
+    WIDTH = 2048
+    PATHS = ([card.filename for card in CountDeck.CARDS] + 
+        ["./assets/card_back" + str(i) + ".png" for i in range(1, 6)] + 
+        ["./assets/chip-" + str(i) + ".png" for i in [1, 5, 10, 20, 50, 100]])
+    surface = None
+    regions = dict()
+
+    @staticmethod
+    def load(path: str) -> Surface:
+        if (TextureAtlas.surface == None):
+            TextureAtlas.build()
+        return TextureAtlas.surface.subsurface(TextureAtlas.regions[path])
+
+    """
+    Converts a packed atlas and makes it current, packing it first if needed
+
+    Keyword Arguments:
+        packed {Tuple[Surface, Dict[str, Rect]]} -- Atlas from pack. (default: {None})
+    """
+    @staticmethod
+    def build(packed: Tuple[Surface, Dict[str, Rect]]=None):
+        atlas, regions = packed or TextureAtlas.decode()
+        TextureAtlas.regions = regions
+        TextureAtlas.surface = TextureManager.convert(atlas)
+
+    """
+    Returns the packed, unconverted atlas, read from the disk cache while
+    none of its images changed
+    """
+    @staticmethod
+    def decode() -> Tuple[Surface, Dict[str, Rect]]:
+        atlas, regions = DiskCache.get("atlas" + str(TextureAtlas.WIDTH), TextureAtlas.PATHS, TextureAtlas._pack_files)
+        return atlas, {path: Rect(region) for path, region in regions.items()}
+
+    @staticmethod
+    def _pack_files() -> Tuple[Surface, Dict[str, List[int]]]:
+        atlas, regions = TextureAtlas.pack({path: pygame.image.load(path) for path in TextureAtlas.PATHS})
+        return atlas, {path: list(region) for path, region in regions.items()}
+
+    """
+    Packs every image into shelves of the atlas, tallest images first. Does
+    not need the display, so it can run on the loader thread
+
+    Arguments:
+        images {Dict[str, Surface]} -- Decoded images by path.
+
+    Returns:
+        Tuple[Surface, Dict[str, Rect]] -- Unconverted atlas and the region of each path.
+    """
+    @staticmethod
+    def pack(images: Dict[str, Surface]) -> Tuple[Surface, Dict[str, Rect]]:
+        order = sorted(TextureAtlas.PATHS, key=lambda path: -images[path].get_height())
+        regions = dict()
+        x, y, shelf = 0, 0, 0
+        for path in order:
+            w, h = images[path].get_size()
+            if (x + w > TextureAtlas.WIDTH):
+                x, y, shelf = 0, y + shelf, 0
+            regions[path] = Rect(x, y, w, h)
+            x += w
+            shelf = max(shelf, h)
+        atlas = Surface((TextureAtlas.WIDTH, y + shelf), pygame.SRCALPHA, 32)
+        for path in order:
+            atlas.blit(images[path], regions[path])
+        return atlas, regions
+
+"""
+Asset loader decodes textures on a worker thread, in the order given, while
+the menu is already interactive. The worker also packs the texture atlas.
+Decoded images are converted and handed to the TextureManager on the main
+thread by pump, which the game loop calls every frame. Textures requested
+before the atlas is ready are loaded on their own instead of waiting for it
+"""
+class AssetLoader:
+    FRAME_BUDGET = 0.004 # Seconds of conversion work allowed per frame
+    paths = []
+    decoded = queue.Queue()
+    done = 0
+    failed = [] # Paths that could not be decoded
+    thread = None
+
+    """
+    Starts decoding on the worker thread, only the first call has an effect
+
+    Arguments:
+        paths {List[str]} -- Paths of the textures, most needed first.
+    """
+    @staticmethod
+    def start(paths: List[str]):
+        if (AssetLoader.thread != None):
+            return
+        AssetLoader.paths = list(paths)
+        AssetLoader.thread = threading.Thread(target=AssetLoader._decode, args=(AssetLoader.paths,), daemon=True)
+        AssetLoader.thread.start()
+
+    """
+    Queues each decoded texture as ([path], image). The atlas images are
+    decoded together, in place of the first one, as (atlas paths, packed
+    atlas). The image is None if a texture could not be decoded, every path
+    is queued whatever happens so loading always finishes
+    """
+    @staticmethod
+    def _decode(paths: List[str]):
+        atlas = False
+        for path in paths:
+            if (path in TextureAtlas.PATHS):
+                if (atlas):
+                    continue
+                atlas = True
+                done, decode = TextureAtlas.PATHS, TextureAtlas.decode
+            else:
+                done, decode = [path], (lambda: DiskCache.image(path))
+            img = None
+            try:
+                img = decode()
+            except Exception:
+                pass
+            finally:
+                AssetLoader.decoded.put((done, img))
+
+    """
+    Converts decoded textures until the queue is empty or the budget is spent
+
+    Keyword Arguments:
+        budget {float} -- Seconds allowed. (default: {FRAME_BUDGET})
+    """
+    @staticmethod
+    def pump(budget: float=FRAME_BUDGET):
+        end = time.perf_counter() + budget
+        while (AssetLoader.loading() and time.perf_counter() < end):
+            try:
+                paths, img = AssetLoader.decoded.get_nowait()
+            except queue.Empty:
+                return
+            AssetLoader.done += len(paths)
+            if (img == None):
+                AssetLoader.failed += paths
+                continue
+            if (paths[0] in TextureAtlas.PATHS):
+                if (TextureAtlas.surface == None):
+                    TextureAtlas.build(img)
+            elif (paths[0] not in TextureManager.textures):
+                TextureManager.save(paths[0], TextureManager.convert(img))
+
+    """
+    Converts every started texture, waiting for the worker as needed, so
+    runs that must repeat exactly do not depend on how fast it decodes
+    """
+    @staticmethod
+    def finish():
+        while (AssetLoader.loading()):
+            AssetLoader.pump()
+            time.sleep(0.001)
+
+    """
+    Returns:
+        bool -- True until every started texture is converted.
+    """
+    @staticmethod
+    def loading() -> bool:
+        return AssetLoader.done < len(AssetLoader.paths)
+
+    """
+    Returns:
+        float -- Fraction of the textures converted so far.
+    """
+    @staticmethod
+    def progress() -> float:
+        return AssetLoader.done / len(AssetLoader.paths) if AssetLoader.paths else 1
 
 """
 Abstract game object
 """
 class GameObject(ABC):
+    moves = 0 # Counts changes to the position or size of any object
+    now = 0 # Ticks of the frame being drawn, read once so every object animates to the same time
+
     def __init__(self, x: int, y: int, width: int, height: int):
         self._x = x
         self._y = y
         self._width = width
         self._height = height
+        self._dirty = True
+        self._drawn = None
+        self._visible = True
 
     @property
     def x(self) -> int:
@@ -692,6 +1735,8 @@ class GameObject(ABC):
     @pos.setter
     def pos(self, value: Tuple[int, int]):
         self._x, self._y = value
+        GameObject.moves += 1
+        self.invalidate()
 
     @property
     def width(self) -> int:
@@ -708,17 +1753,79 @@ class GameObject(ABC):
     @size.setter
     def size(self, value: Tuple[int, int]):
         self._width, self._height = value
+        GameObject.moves += 1
+        self.invalidate()
 
     @property
     def rect(self) -> Rect:
         return Rect(self._x, self._y, self._width, self._height)
 
+    """
+    Hidden objects are kept by their screen but left out of drawing and input
+    """
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    @visible.setter
+    def visible(self, value: bool):
+        if value == self._visible:
+            return
+        self._visible = value
+        GameObject.moves += 1
+        self.invalidate()
+
+    """
+    Area the object covers when drawn this frame
+    """
+    @property
+    def bounds(self) -> Rect:
+        return self.rect
+
+    """
+    True if the object looks different from when it was last drawn
+    """
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def invalidate(self):
+        self._dirty = True
+
+    """
+    Regions to redraw for this object, where it was last drawn and where it is now
+    """
+    def dirty_rects(self) -> List[Rect]:
+        if self._drawn:
+            return [self._drawn, self.bounds]
+        return [self.bounds]
+
+    """
+    Called by the renderer once the object is on screen
+    """
+    def mark_drawn(self):
+        self._drawn = self.bounds
+        self._dirty = False
+
     def move(self, x: int, y: int):
         self.pos = (x, y)
 
+    """
+    True if the event is a pointer event over the object
+    """
+    def hit(self, event: Event) -> bool:
+        return hasattr(event, "pos") and self.rect.collidepoint(event.pos)
+
     def handle(self, event: Event):
         pass
 
+    """
+    The (image, position) pair if the object draws as a single blit, so it
+    can be batched with others. None otherwise
+    """
+    def blit_args(self):
+        return None
+
     @abstractmethod
     def draw(self, canvas: Surface):
         raise NotImplementedError()
@@ -736,7 +1843,7 @@ class TextBox(GameObject):
         self._placeholder_color = placeholder_color
         self._background_color = background_color
         self._halo_color = halo_color
-        self._font = pygame.font.SysFont(font_name, font_size)
+        self._font = FontManager.load(font_name, font_size)
         self._selected = False
         self._empty = (text == None)
         if not self._empty:
@@ -749,24 +1856,38 @@ class TextBox(GameObject):
     def text(self):
         return self._label.text if not self._empty else "" 
 
+    @text.setter
+    def text(self, value: str):
+        self._empty = not value
+        self._label.color = self._placeholder_color if self._empty else self._font_color
+        self._label.text = self._default_text if self._empty else value
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty or self._label.dirty
+
+    def mark_drawn(self):
+        GameObject.mark_drawn(self)
+        self._label.mark_drawn()
+
     def handle(self, event: Event):
         if event.type == pygame.MOUSEBUTTONDOWN:
-            if self.rect.collidepoint(pygame.mouse.get_pos()):
-                self._selected = True
-            else:
-                self._selected = False
+            selected = self.hit(event)
+            if selected != self._selected:
+                self._selected = selected
+                self.invalidate()
         if self._selected and event.type == pygame.KEYDOWN:
             if event.key == pygame.K_BACKSPACE:
                 if (not self._empty):
                     self._label.text = self._label.text[:-1]
                     if (self._label.text == ""):
                         self._empty = True
-                        self._label._color = self._placeholder_color
+                        self._label.color = self._placeholder_color
                         self._label.text = self._default_text
             elif event.unicode != "" and ord(event.unicode)>=32 and ord(event.unicode)<= 126 and self._label.width < self.width-10:
                 if (self._empty):
                     self._label.text = "" + event.unicode
-                    self._label._color = self._font_color
+                    self._label.color = self._font_color
                     self._empty = False
                 else:
                     self._label.text = self._label.text + event.unicode
@@ -796,7 +1917,8 @@ class TextArea(GameObject):
         self._default_width = width
         self._default_height = height
         self._centered = centered
-        self._font = pygame.font.SysFont(font_name, font_size, bold=bold, italic=italic)   
+        self._font = FontManager.load(font_name, font_size, bold, italic)
+        self._texts = None
         GameObject.__init__(self, x, y, width, height)
         self.texts = texts
     
@@ -806,14 +1928,17 @@ class TextArea(GameObject):
 
     @texts.setter
     def texts(self, value: List[str]):
+        if value == self._texts:
+            return
         self._texts = value
-        rects = [self.font.render(text, False, (0,0,0)).get_rect() for text in self._texts]
+        self.invalidate()
+        sizes = [TextCache.size(self.font, text) for text in self._texts]
         if (self._default_width <= 0):
-            width = max([rect.width for rect in rects])+2*self._padding
+            width = max([w for w, h in sizes] + [0])+2*self._padding
         else:
             width = self._default_width
         if (self._default_height <= 0):
-            height = sum([rect.height for rect in rects])+2*self._padding
+            height = sum([h for w, h in sizes])+2*self._padding
         else:
             height = self._default_height
         self.size = (width,height)
@@ -827,7 +1952,7 @@ class TextArea(GameObject):
         return self._font
 
     def draw(self, canvas: Surface):
-        textSurfaces = [self.font.render(text, False, self.color) for text in self.texts]
+        textSurfaces = [TextCache.render(self.font, text, self.color) for text in self.texts]
         if (self._background_color != None):
             pygame.draw.rect(canvas, self._background_color, Rect(self.x, self.y, self.width, self.height))
         [canvas.blit(textSurface, 
@@ -845,8 +1970,8 @@ class Label(GameObject):
             font_size: int=20, font_name: str="Times", bold: int=0, italic: int=0):
         self._text = text
         self._color = color
-        self._font = pygame.font.SysFont(font_name, font_size, bold=bold, italic=italic)    
-        w, h = self.font.render(self.text, False, (0,0,0)).get_rect().size
+        self._font = FontManager.load(font_name, font_size, bold, italic)    
+        w, h = TextCache.size(self.font, self.text)
         GameObject.__init__(self, x, y, w, h)
     
     @property
@@ -855,27 +1980,40 @@ class Label(GameObject):
 
     @text.setter
     def text(self, value: str):
+        if value == self._text:
+            return
         self._text = value
-        self.size = self.font.render(self.text, False, (0,0,0)).get_rect().size
+        self.size = TextCache.size(self.font, self.text)
 
     @property
     def color(self) -> Color:
         return self._color
 
+    @color.setter
+    def color(self, value: Color):
+        if value == self._color:
+            return
+        # The text cache is keyed by color, so the next draw renders the new one
+        self._color = value
+        self.invalidate()
+
     @property
     def font(self) -> Font:
         return self._font
 
+    def blit_args(self):
+        return (TextCache.render(self.font, self.text, self.color), (self.x, self.y))
+
     def draw(self, canvas: Surface):
-        textSurface = self.font.render(self.text, False, self.color)
-        canvas.blit(textSurface, (self.x, self.y))
+        canvas.blit(*self.blit_args())
 
 """
 SpriteObjects render sprites, handle clicks
 """
 class SpriteObject(GameObject):
-    def __init__(self, x: int, y: int, sprite: str, scale: float=1, action=None):
+    def __init__(self, x: int, y: int, sprite: str, scale: float=1, action=None, smooth: bool=False):
         self._scale = scale
+        self._smooth = smooth
         self._action = action
         self.sprite = sprite
         w,h= self.sprite.get_rect().size
@@ -891,21 +2029,21 @@ class SpriteObject(GameObject):
     
     @sprite.setter
     def sprite(self, sprite: str):
-        sprite = TextureManager.load(sprite)
-        if (self.scale != 1):
-            sprite = pygame.transform.scale(sprite, (int(sprite.get_width() * self.scale), int(sprite.get_height()*self.scale)))
-        self._sprite = sprite
+        self._sprite = TextureManager.scaled(sprite, self.scale, self._smooth)
+        self.invalidate()
 
     @property
     def action(self):
         return self._action
         
+    def blit_args(self):
+        return (self.sprite, (self.x, self.y))
+
     def draw(self, canvas: Surface):
         canvas.blit(self.sprite, (self.x, self.y))
     
     def handle(self, event):
-        if (self.action != None and event.type == pygame.MOUSEBUTTONDOWN and 
-                Rect(self.x, self.y, self.width, self.height).collidepoint(pygame.mouse.get_pos())):
+        if (self.action != None and event.type == pygame.MOUSEBUTTONDOWN and self.hit(event)):
             try:
                 self.action(self)
             except:
@@ -916,6 +2054,11 @@ Specialized sprite to allow for card click handling and flipping/dealing
 """
 class CardObject(SpriteObject):
     CARD_BACK = "./assets/card_back.png"
+    DEAL_TIME = 0.4 # Seconds to slide a card to its target
+    FLIP_TIME = 0.25 # Seconds to turn a card over
+    FLIP_FRAMES = 16 # Squashed widths baked for each card face and back
+    FLIP_SIZE = 32 # Card images whose flip frames are kept, the least recently flipped go first
+    flip_frames = OrderedDict()
 
     def __init__(self, x: int, y: int, card: Card, flipped: bool=True, scale: float=1, action=None):
         self._card = card
@@ -935,7 +2078,11 @@ class CardObject(SpriteObject):
 
     def flip(self):
         self._flipping = True
-        self._flipX = 0
+        self._turned = False
+        self._frames = self._bake(self.card.filename if self._flipped else CardObject.CARD_BACK)
+        self._turnFrames = self._bake(CardObject.CARD_BACK if self._flipped else self.card.filename)
+        # The flip starts on the first frame after any deal has finished
+        self._flipStart = None
     
     def deal(self, targetX, targetY):
         self._dealing = True
@@ -943,35 +2090,116 @@ class CardObject(SpriteObject):
         self._targetY = targetY
         self._dealX = self.x
         self._dealY = self.y
+        self._dealStart = pygame.time.get_ticks()
     
-    def draw(self, canvas: Surface):
+    @property
+    def dirty(self) -> bool:
+        return self._dirty or self._dealing or self._flipping
+
+    @property
+    def bounds(self) -> Rect:
+        self._advance()
         if self._dealing:
-            if (self._dealX == self._targetX and self._dealY == self._targetY):
-                self._dealing = False
-                self._x = self._targetX
-                self._y = self._targetY
-            else:
-                self._dealX += (self._targetX-self._x)/10
-                self._dealY += (self._targetY-self._y)/10
-                canvas.blit(self.sprite, (self._dealX, self._dealY))
-        elif self._flipping:
-            if (self._flipX >= self.width):
+            return Rect(self._dealPos(), self.size)
+        if self._flipping:
+            return Rect(self._flipPos(), (self._flipWidth(), self.height))
+        return self.rect
+
+    def blit_args(self):
+        self._advance()
+        if self._dealing:
+            return (self.sprite, self._dealPos())
+        if self._flipping:
+            return (self._flipFrame(), self._flipPos())
+        return (self.sprite, (self.x, self.y))
+
+    def draw(self, canvas: Surface):
+        canvas.blit(*self.blit_args())
+
+    def _advance(self):
+        # The frame time makes the redrawn region, the blit and _drawn agree on where the card is
+        self._now = max(GameObject.now, self._dealStart if self._dealing else 0)
+        if self._dealing and self._dealProgress() >= 1:
+            self._dealing = False
+            self._x = self._targetX
+            self._y = self._targetY
+            GameObject.moves += 1
+            self.invalidate()
+        if self._flipping and not self._dealing:
+            if (self._flipStart == None):
+                self._flipStart = self._now
+            t = self._flipProgress()
+            if (t >= 0.5 and not self._turned):
+                self._turned = True
+                self._frames = self._turnFrames
+                self._sprite = self._frames[-1]
+                self.invalidate()
+            if (t >= 1):
                 self._flipped = not(self._flipped)
-                self._flipX = 0
                 self._flipping = False
-                canvas.blit(self.sprite, (self.x, self.y))
-            elif (2*self._flipX >= self.width):
-                img = pygame.transform.scale(self.sprite, (self.width-2*(self.width - self._flipX), self.height))
-                canvas.blit(img, (self.x + (self.width - self._flipX), self.y))
-                self._flipX = self._flipX + 10
-            else:
-                img = pygame.transform.scale(self.sprite, (self.width-2*self._flipX, self.height))
-                canvas.blit(img, (self.x + self._flipX, self.y))
-                self._flipX = self._flipX + 10
-                if (2*self._flipX >= self.width):
-                    self.sprite = CardObject.CARD_BACK if self._flipped else self.card.filename
-        else:
-            canvas.blit(self.sprite, (self.x, self.y))
+                self.invalidate()
+
+    def _dealProgress(self) -> float:
+        return (self._now - self._dealStart) / (CardObject.DEAL_TIME * 1000)
+
+    def _dealPos(self) -> Tuple[int, int]:
+        eased = CardObject._ease_out(self._dealProgress())
+        return (self._dealX + (self._targetX - self._dealX) * eased, 
+            self._dealY + (self._targetY - self._dealY) * eased)
+
+    def _flipProgress(self) -> float:
+        return (self._now - self._flipStart) / (CardObject.FLIP_TIME * 1000)
+
+    def _flipFrame(self) -> Surface:
+        # Squash towards the middle of the card and back out
+        squash = abs(1 - 2 * CardObject._ease_in_out(min(self._flipProgress(), 1)))
+        return self._frames[int(round(squash * CardObject.FLIP_FRAMES))]
+
+    def _flipWidth(self) -> int:
+        return self._flipFrame().get_width()
+
+    """
+    Returns the squashed frames of a card image from narrowest to full width,
+    baking them the first time the image is flipped at this scale. Frames of
+    card backs and scales no longer in use are dropped once FLIP_SIZE images
+    have been baked
+    """
+    def _bake(self, path: str) -> List[Surface]:
+        key = (path, self.scale)
+        if (key in CardObject.flip_frames):
+            CardObject.flip_frames.move_to_end(key)
+            return CardObject.flip_frames[key]
+        sprite = TextureManager.scaled(path, self.scale)
+        w, h = sprite.get_size()
+        frames = [pygame.transform.scale(sprite, (max(1, int(w * i / CardObject.FLIP_FRAMES)), h)) 
+            for i in range(CardObject.FLIP_FRAMES)]
+        CardObject.flip_frames[key] = frames + [sprite]
+        if (len(CardObject.flip_frames) > CardObject.FLIP_SIZE):
+            CardObject.flip_frames.popitem(last=False)
+        return CardObject.flip_frames[key]
+
+    def _flipPos(self) -> Tuple[int, int]:
+        return (self.x + (self.width - self._flipWidth()) / 2, self.y)
+
+    @staticmethod
+    def _ease_out(t: float) -> float:
+        return 1 - (1 - t) ** 3
+
+    @staticmethod
+    def _ease_in_out(t: float) -> float:
+        return 4 * t ** 3 if t < 0.5 else 1 - (-2 * t + 2) ** 3 / 2
+
+"""
+Outline drawn around another object, such as a selected card
+"""
+class Border(GameObject):
+    def __init__(self, x: int, y: int, width: int, height: int, color: Color=Colors.black, border_width: int=1):
+        self._color = color
+        self._border_width = border_width
+        GameObject.__init__(self, x, y, width, height)
+
+    def draw(self, canvas: Surface):
+        pygame.draw.rect(canvas, self._color, self.rect, self._border_width)
 
 """
 Clickable buttons
@@ -1002,8 +2230,11 @@ class Button(GameObject):
 
     @text.setter
     def text(self, value: str):
+        if value == self._label.text:
+            return
         self._label.text = value
         self._adjust_label()
+        self.invalidate()
 
     @property
     def padding(self) -> int:
@@ -1021,6 +2252,10 @@ class Button(GameObject):
     def action(self):
         return self._action
 
+    @action.setter
+    def action(self, value):
+        self._action = value
+
     @property
     def down_color(self):
         return self._down_color
@@ -1040,15 +2275,27 @@ class Button(GameObject):
             pygame.draw.rect(canvas, self._border_color, self.rect, self.border_width)
         self._label.draw(canvas)
     
+    @property
+    def dirty(self) -> bool:
+        return self._dirty or self._label.dirty
+
+    def mark_drawn(self):
+        GameObject.mark_drawn(self)
+        self._label.mark_drawn()
+
     def handle(self, event: Event):
+        down = self._down
         self._down = False
-        if self.rect.collidepoint(pygame.mouse.get_pos()):
+        if self.hit(event):
             if event.type == pygame.MOUSEBUTTONUP and self._action:
                 self._action()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 self._down = True
+        if down != self._down:
+            self.invalidate()
 
     def _adjust_label(self):
+        GameObject.moves += 1
         self._width = max(
                 self._default_width, self._label.width + 2 * self._padding)
         self._height = max(
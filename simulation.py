@@ -0,0 +1,241 @@
+"""
+Compares Let it Ride strategies by playing them on the same stream of deals.
+
+Every strategy sees the same cards (common random numbers), each deal is
+paired with its antithetic deal, and the exact expected value of the first
+three cards is used as a control variate. Together these make the estimate
+of the difference between two strategies far tighter than running each
+strategy on its own deals.
+
+Run it with:
+    python simulation.py --rounds 10000 --decks 1
+"""
+import argparse
+import math
+import random
+from typing import Callable, Dict, List
+from core import Card, CountDeck, Hand, Statistics
+
+"""
+A strategy decides whether to ride given the visible cards and the stage (1 or 2)
+"""
+Strategy = Callable[[Hand, int], bool]
+
+
+def optimal(decks: int=1) -> Strategy:
+    """
+    Rides whenever the exact expected value of the visible cards is not negative.
+
+    Keyword Arguments:
+        decks {int} -- Number of decks the cards are dealt from. (default: {1})
+
+    Returns:
+        Strategy -- Strategy callable.
+    """
+    return lambda hand, stage: Statistics.memoExpectedValue(hand.cards, decks) >= 0
+
+
+def simple(hand: Hand, stage: int) -> bool:
+    """
+    Rides on a paying hand, or at stage 2 on four to a flush.
+
+    Arguments:
+        hand {Hand} -- Visible cards.
+        stage {int} -- Stage of the round.
+
+    Returns:
+        bool -- True if the bet should be ridden.
+    """
+    ranks = [card.rank for card in hand]
+    pairs = [r for r in set(ranks) if ranks.count(r) >= 2]
+    if [r for r in pairs if r == 1 or r >= 10] or [r for r in pairs if ranks.count(r) >= 3]:
+        return True
+    if stage == 2 and len(set(card.Suit for card in hand)) == 1:
+        return True
+    return False
+
+
+def always(hand: Hand, stage: int) -> bool:
+    """
+    Never pulls a bet.
+    """
+    return True
+
+
+def payoff(strategy: Strategy, cards: List[Card]) -> int:
+    """
+    Plays a deal with a strategy.
+
+    Arguments:
+        strategy {Strategy} -- Strategy to play.
+        cards {List[Card]} -- The 5 cards of the deal, in dealing order.
+
+    Returns:
+        int -- Win or loss in units of a single bet.
+    """
+    bets = 1 + bool(strategy(Hand(cards[:3]), 1)) + bool(strategy(Hand(cards[:4]), 2))
+    return multiplier(cards) * bets
+
+
+def multiplier(cards: List[Card]) -> int:
+    """
+    Returns:
+        int -- Payout per bet left on the table, -1 for a losing hand.
+    """
+    return Hand.payouts.get(Hand(cards).type, -1)
+
+
+def antithetic(cards: List[Card]) -> List[Card]:
+    """
+    Mirrors the ranks of a deal (2 <-> A, 3 <-> K, ..., 8 <-> 8). Any
+    relabelling of the deck turns a random deal into an equally likely one,
+    and this one turns high pairs into low pairs, so payoffs of a deal and
+    its mirror are negatively correlated.
+
+    Arguments:
+        cards {List[Card]} -- Deal to mirror.
+
+    Returns:
+        List[Card] -- Mirrored deal.
+    """
+    mirrored = []
+    for card in cards:
+        value = 16 - (14 if card.rank == 1 else card.rank)
+        mirrored.append(Card(1 if value == 14 else value, card.Suit))
+    return mirrored
+
+
+class Estimate:
+    """
+    Class representing an estimated expected value and its confidence interval.
+    """
+    def __init__(self, name: str, mean: float, half_width: float, variance_reduction: float):
+        """
+        Arguments:
+            name {str} -- What was estimated.
+            mean {float} -- Estimated value per unit bet.
+            half_width {float} -- Half width of the confidence interval.
+            variance_reduction {float} -- Variance of independent runs with
+                the same number of deals divided by the variance achieved.
+        """
+        self.name = name
+        self.mean = mean
+        self.half_width = half_width
+        self.variance_reduction = variance_reduction
+
+    def __str__(self) -> str:
+        return "%-28s %+.5f +/- %.5f  (variance reduction x%.1f)" % (
+            self.name, self.mean, self.half_width, self.variance_reduction)
+
+
+def compare(
+        strategies: Dict[str, Strategy], rounds: int=10000, decks: int=1,
+        confidence: float=0.95, seed: int=None) -> List[Estimate]:
+    """
+    Estimates the expected value of each strategy and the difference of each
+    strategy from the first one.
+
+    Arguments:
+        strategies {Dict[str, Strategy]} -- Strategies by name, the first
+            one is the baseline.
+
+    Keyword Arguments:
+        rounds {int} -- Number of antithetic deal pairs. (default: {10000})
+        decks {int} -- Number of decks each deal comes from. (default: {1})
+        confidence {float} -- Confidence level of the intervals. (default: {0.95})
+        seed {int} -- Seed of the deal stream. (default: {None})
+
+    Raises:
+        ValueError -- Raised for infinite decks, which have no exact control.
+
+    Returns:
+        List[Estimate] -- Estimates for each strategy, then each difference.
+    """
+    if decks >= 100:
+        raise ValueError("The control variate needs a finite deck")
+    if rounds < 2:
+        raise ValueError("At least 2 rounds are needed")
+    names = list(strategies)
+    rng = random.Random(seed)
+    samples = {name: [] for name in names}
+    raw = {name: [] for name in names}
+    controls = []
+    for _ in range(rounds):
+        cards = [CountDeck.CARDS[i % 52] for i in rng.sample(range(52 * decks), 5)]
+        pair = [cards, antithetic(cards)]
+        # Known mean of 0: the final multiplier minus its exact expectation
+        # given the first 3 cards.
+        controls.append(sum(
+            multiplier(deal) - Statistics.memoExpectedValue(deal[:3], decks)
+            for deal in pair) / 2)
+        for name in names:
+            payoffs = [payoff(strategies[name], deal) for deal in pair]
+            samples[name].append(sum(payoffs) / 2)
+            raw[name] += payoffs
+
+    z = normal_quantile((1 + confidence) / 2)
+    estimates = []
+    for name in names:
+        estimates.append(_estimate(name, samples[name], controls, z, _variance(raw[name])))
+    base = names[0]
+    for name in names[1:]:
+        differences = [a - b for a, b in zip(samples[name], samples[base])]
+        independent = _variance(raw[name]) + _variance(raw[base])
+        estimates.append(_estimate(name + " - " + base, differences, controls, z, independent))
+    return estimates
+
+
+def normal_quantile(p: float) -> float:
+    """
+    Inverts the standard normal distribution function by bisection.
+
+    Arguments:
+        p {float} -- Probability strictly between 0 and 1.
+
+    Returns:
+        float -- Value a standard normal variable is below with probability p.
+    """
+    low, high = -40.0, 40.0
+    for _ in range(100):
+        middle = (low + high) / 2
+        if 0.5 * (1 + math.erf(middle / math.sqrt(2))) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def _estimate(name: str, values: List[float], controls: List[float], z: float, independent: float) -> Estimate:
+    n = len(values)
+    mean_v = sum(values) / n
+    mean_c = sum(controls) / n
+    var_c = _variance(controls)
+    cov = sum((v - mean_v) * (c - mean_c) for v, c in zip(values, controls)) / (n - 1)
+    beta = cov / var_c if var_c > 0 else 0
+    adjusted = [v - beta * c for v, c in zip(values, controls)]
+    variance = _variance(adjusted)
+    # Independent runs would use 2n deals per strategy, one per deal.
+    reduction = (independent / (2 * n)) / (variance / n) if variance > 0 else math.inf
+    return Estimate(name, sum(adjusted) / n, z * math.sqrt(variance / n), reduction)
+
+
+def _variance(values: List[float]) -> float:
+    mean = sum(values) / len(values)
+    return sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare Let it Ride strategies on common deals.")
+    parser.add_argument("--rounds", type=int, default=10000, help="antithetic deal pairs to play")
+    parser.add_argument("--decks", type=int, default=1, help="decks each deal comes from")
+    parser.add_argument("--confidence", type=float, default=0.95, help="confidence level")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the deal stream")
+    args = parser.parse_args()
+
+    results = compare({
+        "optimal": optimal(args.decks),
+        "simple": simple,
+        "always ride": always
+    }, args.rounds, args.decks, args.confidence, args.seed)
+    for estimate in results:
+        print(estimate)
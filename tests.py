@@ -1,5 +1,16 @@
+import collections
+import itertools
+import json
+import os
+import random
+import tempfile
 import unittest
-from core import Deck, Card, Hand, Suit, Game, Player, HandType, Statistics
+import benchmark
+import memory
+import replay
+import simulation
+import tracing
+from core import Deck, Card, Hand, Suit, Game, Player, HandType, Statistics, Shoe, CountDeck
 
 class TestMethods(unittest.TestCase):
     def test_create_deck(self):
@@ -16,6 +27,67 @@ class TestMethods(unittest.TestCase):
         self.assertEqual(len(deck), deck_size - 1, "Card not removed from deck")
         self.assertIsInstance(card, Card, "Draw does not return card")
 
+    def test_count_deck(self):
+        deck = CountDeck(8)
+        self.assertEqual(len(deck), 416)
+        self.assertEqual(len(deck.cards), 416)
+        deck.remove(Card(1, Suit.spades))
+        self.assertEqual(deck.count(Card(1, Suit.spades)), 7)
+        drawn = [deck.draw() for _ in range(415)]
+        self.assertEqual(len(deck), 0)
+        self.assertEqual(drawn.count(Card(1, Suit.spades)), 7)
+        self.assertEqual(drawn.count(Card(13, Suit.hearts)), 8)
+        self.assertRaises(IndexError, deck.draw)
+
+        deck = CountDeck(100)
+        deck.draw()
+        self.assertEqual(len(deck), 52, "Infinite deck lost a card")
+
+    def test_shoe(self):
+        shoe = Shoe(2, penetration=0.5)
+        self.assertEqual(len(shoe), 104)
+        card = shoe.draw()
+        self.assertEqual(len(shoe), 103, "Card not removed from shoe")
+        self.assertEqual(shoe.count(card), 1)
+        self.assertEqual(sum(shoe.composition), 103)
+        while not shoe.needs_shuffle:
+            shoe.draw()
+        self.assertEqual(len(shoe), 52, "Cut card not at penetration")
+        shoe.reshuffle()
+        self.assertEqual(len(shoe), 104)
+        self.assertEqual(shoe.composition, [2] * 52)
+
+    def test_game_shoe(self):
+        game = Game(1, shoe=True, penetration=0.5)
+        game.deal()
+        game.deal()
+        self.assertEqual(len(game.deck), 42, "Shoe rebuilt between hands")
+        hand = [Card(1, Suit.clubs), Card(13, Suit.hearts)]
+        game.deal(hand)
+        self.assertEqual(game.player.hand.cards[:2], hand)
+        self.assertEqual(game.deck.count(Card(1, Suit.clubs)), 0)
+        unseen = game.unseen_composition(hand)
+        self.assertEqual(sum(unseen), len(game.deck) + 3, "Face down cards not counted as unseen")
+        for card in game.player.hand.cards[2:]:
+            self.assertEqual(unseen[card.index], game.deck.count(card) + 1)
+
+    def test_known_cards(self):
+        game = Game(1)
+        hand = [Card(1, Suit.clubs), Card(13, Suit.hearts)]
+        game.known_cards = hand
+        game.known_cards = hand
+        game.deal()
+        self.assertEqual(game.player.hand.cards[:2], hand)
+        self.assertEqual(game.known_cards, [])
+
+    def test_play(self):
+        game = Game(1, money=1000)
+        stages = []
+        net = game.play(5, ride=lambda hand, stage: stages.append((len(hand), stage)))
+        self.assertEqual(stages, [(3, 1), (4, 2)])
+        self.assertEqual(net, game.player.hand.payout(5) - 15 + 10)
+        self.assertEqual(game.player.money, 1000 + net)
+
     def test_royal_flush(self):
         cards = [
             Card(1, Suit.clubs),
@@ -144,6 +216,40 @@ class TestMethods(unittest.TestCase):
         ]
         self.assertEqual(Hand(cards).type, HandType.high)
 
+    def test_type_matches_reference(self):
+        # Classifies hands from rank and suit counts, independently of Hand.type
+        def reference(cards):
+            ranks = sorted(card.rank for card in cards)
+            counts = sorted(collections.Counter(ranks).values(), reverse=True)
+            flush = len(set(card.Suit for card in cards)) == 1
+            royal = ranks == [1, 10, 11, 12, 13]
+            straight = royal or (counts[0] == 1 and ranks[-1] - ranks[0] == 4)
+            if royal and flush:
+                return HandType.royal_flush
+            if straight and flush:
+                return HandType.straight_flush
+            if straight:
+                return HandType.straight
+            if flush:
+                return HandType.flush
+            if counts[0] == 4:
+                return HandType.four_of_kind
+            if counts[:2] == [3, 2]:
+                return HandType.full_house
+            if counts[0] == 3:
+                return HandType.three_of_kind
+            if counts[:2] == [2, 2]:
+                return HandType.two_pair
+            if counts[0] == 2:
+                pair = [r for r, n in collections.Counter(ranks).items() if n == 2][0]
+                return HandType.high_pair if pair in [1, 10, 11, 12, 13] else HandType.pair
+            return HandType.high
+        rng = random.Random(0)
+        cards = Deck(2).cards
+        for _ in range(20000):
+            hand = rng.sample(cards, 5)
+            self.assertEqual(Hand(hand).type, reference(hand), [str(c) for c in hand])
+
     def test_side_royal(self):
         cards = [
             Card(11, Suit.hearts),
@@ -246,6 +352,108 @@ class TestMethods(unittest.TestCase):
                 self.assertEqual(v, 0)
         self.assertEqual(sum(handDistribution.values()), 1176)
 
+    def test_composition_distribution(self):
+        hand = [Card(3, Suit.clubs), Card(3, Suit.spades), Card(10, Suit.clubs)]
+        for known, decks in [(hand, 1), (hand, 2), (hand, 3), (hand[:2], 2)]:
+            # Every group of physical cards left in the decks, dealt one by one
+            cards = Deck(decks).cards
+            for card in known:
+                cards.remove(card)
+            expected = collections.Counter(Hand(known + list(drawn)).type
+                for drawn in itertools.combinations(cards, 5 - len(known)))
+            distribution = Statistics.compositionDistribution(
+                known, Statistics.remainingComposition(decks, known))
+            for t in HandType:
+                self.assertEqual(distribution[t], expected[t], (len(known), decks, t))
+        self.assertEqual(
+            sum(Statistics.handDistribution(hand, 2).values()), 101 * 100 / 2)
+
+        dead = [Card(3, Suit.hearts), Card(3, Suit.diamonds)]
+        composition = Statistics.remainingComposition(1, hand + dead)
+        distribution = Statistics.compositionDistribution(hand, composition)
+        self.assertEqual(distribution[HandType.three_of_kind], 0)
+        self.assertEqual(sum(distribution.values()), 47 * 46 / 2)
+
+    def test_compare_strategies(self):
+        cards = [Card(1, Suit.clubs), Card(8, Suit.spades), Card(12, Suit.clubs)]
+        self.assertEqual(
+            [str(c) for c in simulation.antithetic(cards)], ["2C", "8S", "4C"])
+        results = simulation.compare({
+            "a": simulation.simple,
+            "b": simulation.simple
+        }, rounds=20, seed=1)
+        self.assertEqual(len(results), 3)
+        self.assertAlmostEqual(results[0].mean, results[1].mean)
+        self.assertEqual(results[2].mean, 0)
+        self.assertAlmostEqual(simulation.normal_quantile(0.975), 1.959964, places=6)
+
+    def test_benchmark(self):
+        names = [case.name for case in benchmark.cases()]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertIn("Statistics.handDistribution(0, 8)", names)
+        case = benchmark.Case("sum", lambda: sum(range(10)))
+        results = benchmark.run([case], {"sum": 1e-9})
+        self.assertGreater(results[0].seconds, 0)
+        self.assertEqual(benchmark.regressions(results, 0.25), results)
+        self.assertEqual(benchmark.regressions(results, results[0].ratio), [])
+        self.assertEqual(benchmark.report(results)["results"], {"sum": results[0].seconds})
+
+    def test_memory(self):
+        deck, sites = memory.retained(lambda: Deck(8))
+        self.assertGreater(deck, 416 * 48)
+        self.assertTrue(sites[0].startswith("core.py"))
+        count_deck, _ = memory.retained(lambda: CountDeck(8))
+        self.assertLess(count_deck, deck / 10)
+        size, _ = memory.peak(lambda: [0] * 100000)
+        self.assertGreaterEqual(size, 800000)
+        self.assertTrue(memory.Result("a", 2, [], 1).over)
+        self.assertFalse(memory.Result("a", 2, []).over)
+
+    def test_replay(self):
+        event = replay.Event(replay.pygame.MOUSEBUTTONDOWN, pos=(10, 20), button=1)
+        recorded = json.loads(json.dumps(replay.encode(event)))
+        self.assertEqual(replay.decode(recorded), event)
+        times = replay.FrameTimes()
+        for seconds in [0.001, 0.002, 0.003, 0.004]:
+            times.add("GameScreen", seconds)
+        report = times.report()["GameScreen"]
+        self.assertEqual(report["frames"], 4)
+        self.assertAlmostEqual(report["mean"], 2.5)
+        self.assertAlmostEqual(report["max"], 4)
+        self.assertEqual(len(replay.tour()["frames"]), len({f["ticks"] for f in replay.tour()["frames"]}))
+
+    def test_tracing(self):
+        original = Statistics.__dict__["handDistribution"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            tracing.enable(path)
+            try:
+                hand = [Card(3, Suit.clubs), Card(3, Suit.spades), Card(10, Suit.clubs)]
+                Statistics.handDistribution(hand, 1)
+                with tracing.span("test"):
+                    Hand(hand + [Card(3, Suit.hearts), Card(1, Suit.clubs)]).type
+                tracing.write(path)
+                with open(path) as f:
+                    events = json.load(f)["traceEvents"]
+                totals = tracing.totals()
+            finally:
+                tracing.disable()
+        names = [event["name"] for event in events if event["ph"] == "X"]
+        self.assertEqual(names.count("Statistics.handDistribution"), 1)
+        self.assertEqual(totals["test"][0], 1)
+        self.assertGreater(totals["Hand.type"][0], 1)
+        self.assertIs(Statistics.__dict__["handDistribution"], original)
+        self.assertFalse(tracing.enabled)
+
+    def test_memo_expected_value(self):
+        Statistics._evCache.clear()
+        hand = [Card(2, Suit.clubs), Card(2, Suit.diamonds), Card(3, Suit.clubs)]
+        relabelled = [Card(2, Suit.clubs), Card(2, Suit.diamonds), Card(3, Suit.diamonds)]
+        self.assertAlmostEqual(Statistics.memoExpectedValue(hand),
+            Statistics.expectedValue(hand, Statistics.handDistribution(hand, 1)))
+        self.assertEqual(Statistics.memoExpectedValue(relabelled), Statistics.memoExpectedValue(hand))
+        self.assertEqual(len(Statistics._evCache), 1, "Suit relabelling not keyed the same")
+
     def test_expected_pull(self):
         hand = [Card(3, Suit.clubs), Card(3, Suit.spades), Card(10, Suit.clubs)]
         self.assertEqual(Statistics.shouldRide(hand), False)
@@ -0,0 +1,228 @@
+"""
+Records how long the game's hot paths take, as spans on a timeline.
+
+Nothing is instrumented until tracing is enabled: enable() wraps the traced
+functions in place and disable() puts the originals back, so a game that
+is not traced runs exactly the code it always did. The only spans left in
+the code permanently are the frame phases of main.py, which cost a global
+lookup each when tracing is off.
+
+On exit the spans are written as a Chrome trace (open it in
+chrome://tracing or https://ui.perfetto.dev) next to a summary of the time
+spent in each span.
+
+Enable it with either of:
+    python main.py --trace trace.json
+    LETITRIDE_TRACE=trace.json python main.py
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+ENV = "LETITRIDE_TRACE"
+MAX_EVENTS = 1000000 # Spans past this many are only counted in the summary
+
+enabled = False
+_path = None
+_origin = 0
+_events = []
+_totals = dict()
+_patched = []
+_lock = threading.Lock()
+
+
+class _Off:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_off = _Off()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, time.perf_counter())
+
+
+def span(name: str):
+    """
+    Times a block of code when tracing is enabled.
+
+    Arguments:
+        name {str} -- Name of the span.
+
+    Returns:
+        Context manager timing the block, or doing nothing when tracing is off.
+    """
+    return _Span(name) if enabled else _off
+
+
+def enable(path: str):
+    """
+    Instruments the hot paths and writes the trace to a file on exit.
+
+    Arguments:
+        path {str} -- Chrome trace file to write, the summary is written
+            beside it with a .summary.txt extension.
+    """
+    global enabled, _path, _origin
+    if enabled:
+        return
+    _path = path
+    _origin = time.perf_counter()
+    for owner, attribute, name in _targets():
+        _patch(owner, attribute, name)
+    enabled = True
+    atexit.register(finish)
+
+
+def disable():
+    """
+    Restores the original functions and discards the recorded spans.
+    """
+    global enabled, _path
+    for owner, attribute, original in reversed(_patched):
+        setattr(owner, attribute, original)
+    _patched.clear()
+    _events.clear()
+    _totals.clear()
+    enabled = False
+    _path = None
+    atexit.unregister(finish)
+
+
+def finish():
+    """
+    Writes the trace and its summary if tracing is enabled.
+    """
+    if not enabled or not _path:
+        return
+    write(_path)
+    summary_path = os.path.splitext(_path)[0] + ".summary.txt"
+    with open(summary_path, "w") as f:
+        f.write(summary())
+    print("Trace written to %s, summary in %s" % (_path, summary_path))
+
+
+def write(path: str):
+    """
+    Writes the recorded spans as a Chrome trace.
+
+    Arguments:
+        path {str} -- File to write.
+    """
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+    trace = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+              "args": {"name": "Let it Ride"}}]
+    for name, tid, start, duration in events:
+        trace.append({"name": name, "cat": name.split(".")[0], "ph": "X",
+                      "ts": start * 1e6, "dur": duration * 1e6, "pid": pid, "tid": tid})
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+def totals() -> Dict[str, Tuple[int, float, float]]:
+    """
+    Returns:
+        Dict[str, Tuple[int, float, float]] -- Calls, total and longest
+            duration in seconds of each span.
+    """
+    with _lock:
+        return {name: tuple(total) for name, total in _totals.items()}
+
+
+def summary() -> str:
+    """
+    Returns:
+        str -- Table of the spans, the most expensive first.
+    """
+    lines = ["%-40s %9s %11s %10s %10s" % ("span", "calls", "total ms", "mean us", "max us")]
+    spans = sorted(totals().items(), key=lambda item: item[1][1], reverse=True)
+    for name, (calls, total, longest) in spans:
+        lines.append("%-40s %9d %11.2f %10.1f %10.1f" % (
+            name, calls, total * 1e3, total / calls * 1e6, longest * 1e6))
+    dropped = sum(calls for calls, _, _ in totals().values()) - len(_events)
+    if dropped > 0:
+        lines.append("%d spans were left out of the trace after the first %d" % (dropped, MAX_EVENTS))
+    return "\n".join(lines) + "\n"
+
+
+def _record(name: str, start: float, end: float):
+    duration = end - start
+    with _lock:
+        total = _totals.get(name)
+        if total is None:
+            _totals[name] = [1, duration, duration]
+        else:
+            total[0] += 1
+            total[1] += duration
+            if duration > total[2]:
+                total[2] = duration
+        if len(_events) < MAX_EVENTS:
+            _events.append((name, threading.get_ident(), start - _origin, duration))
+
+
+def _traced(name: str, function: Callable) -> Callable:
+    @functools.wraps(function)
+    def traced(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _record(name, start, time.perf_counter())
+    return traced
+
+
+def _patch(owner: type, attribute: str, name: str):
+    original = owner.__dict__[attribute]
+    if isinstance(original, staticmethod):
+        wrapped = staticmethod(_traced(name, original.__func__))
+    elif isinstance(original, property):
+        wrapped = property(_traced(name, original.fget), original.fset, original.fdel, original.__doc__)
+    else:
+        wrapped = _traced(name, original)
+    _patched.append((owner, attribute, original))
+    setattr(owner, attribute, wrapped)
+
+
+def _targets() -> List[Tuple[type, str, str]]:
+    from core import Game, Hand, Statistics
+    targets = [
+        (Statistics, "handDistribution", "Statistics.handDistribution"),
+        (Statistics, "compositionDistribution", "Statistics.compositionDistribution"),
+        (Hand, "type", "Hand.type"),
+        (Game, "deal", "Game.deal")
+    ]
+    try:
+        from screen import Screen, TextureManager
+    except ImportError:
+        # Without pygame only the game logic can be traced
+        return targets
+    targets.append((TextureManager, "load", "TextureManager.load"))
+    screens = list(Screen.__subclasses__())
+    for screen in screens:
+        screens += screen.__subclasses__()
+        for method in ["handle", "update", "draw"]:
+            if method in screen.__dict__:
+                targets.append((screen, method, screen.__name__ + "." + method))
+    return targets